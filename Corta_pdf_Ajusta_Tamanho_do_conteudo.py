@@ -1,9 +1,50 @@
-import fitz  # PyMuPDF
-import tkinter as tk
-from tkinter import filedialog, ttk, messagebox
-from PIL import Image, ImageTk
-import io
 import json
+import multiprocessing
+import os
+import queue
+import time
+
+from pdfcropper import trace
+from pdfcropper.autocrop import AutoCropper
+from pdfcropper.background import ExportWorker
+from pdfcropper.cache import DEFAULT_BUDGET_MB, RenderCache
+from pdfcropper.content import DEFAULT_MAX_DPI, DEFAULT_MIN_DPI
+from pdfcropper.core import (DISPLAY_SCALE, TARGET_SIZES, PageStates, lazy_import,
+                             page_display_rect_to_pdf, page_pixel_size,
+                             parse_page_selection)
+from pdfcropper.croptable import CropTable, page_rect_to_cropbox, pages_for_rule
+from pdfcropper.diskcache import DiskRenderCache, disk_key, file_fingerprint
+from pdfcropper.export import default_workers, save_cropboxes, snapshot_document
+from pdfcropper.prefetch import PagePrefetcher, prefetch_order
+from pdfcropper.stats import FrameStats
+from pdfcropper.thumbnails import (THUMB_CACHE_MB, THUMB_HEIGHT, THUMB_PAD,
+                                   THUMB_ROW_HEIGHT, THUMB_STRIP_WIDTH, ThumbnailRenderer,
+                                   thumbnail_key, thumbnail_range)
+from pdfcropper.tiles import TILE_SIZE, TILE_ZOOM_THRESHOLD, tile_clip, visible_tiles
+from pdfcropper.view import apply_crop, base_image, load_rotated, resize_view, view_sizes
+
+# Importações pesadas só acontecem no primeiro uso: processos de exportação
+# que reimportam este script (spawn no Windows/macOS) não carregam Tk nem fitz.
+fitz = lazy_import("fitz")  # PyMuPDF
+tk = lazy_import("tkinter")
+filedialog = lazy_import("tkinter.filedialog")
+messagebox = lazy_import("tkinter.messagebox")
+simpledialog = lazy_import("tkinter.simpledialog")
+ttk = lazy_import("tkinter.ttk")
+Image = lazy_import("PIL.Image")
+ImageTk = lazy_import("PIL.ImageTk")
+
+# Rótulos da interface para os modos de ajuste de pdfcropper.export.FIT_MODES
+FIT_MODE_LABELS = {"Ajustar": "fit", "Preencher": "fill", "Esticar": "stretch"}
+OUTPUT_MODE_LABELS = {"Vetorial": "vector", "Raster (imagem)": "raster"}
+ENCODING_LABELS = {"Auto": "auto", "PNG": "png", "JPEG": "jpeg"}
+AUTOCROP_LABELS = {"Por página": "page", "União": "union", "Mediana": "median"}
+# "Auto" escolhe a resolução de cada página pelo conteúdo
+DPI_CHOICES = ("Auto", "150", "300", "400", "600")
+# Quanto a exibição espera pela renderização da página antes de pintar a prévia
+PREVIEW_WAIT_MS = 40
+# Intervalo entre as consultas pela versão definitiva da página
+REFINE_POLL_MS = 30
 
 
 class PDFCropper:
@@ -17,18 +58,62 @@ class PDFCropper:
         self.drag_start = None
         self.rect_id = None
         self.overlay_id = None
+        # Preenchidos sob demanda: só páginas alteradas aparecem aqui
         self.original_cropboxes = {}
+        self.original_rotations = {}
+        self.modified_pages = set()
+        self.crop_table = None
         self.last_crop_rect = None
-        self.page_states = {}
+        self.page_states = PageStates(self.original_rotation)
         self.current_item_id = None
         self.pan_start = None
 
         self.page_size = tk.StringVar(value="A4")
-        self.display_scale = 0.75
+        self.display_scale = DISPLAY_SCALE
         self.zoom_level = tk.DoubleVar(value=1.0)
         self.zoom_label_text = tk.StringVar(value="Zoom: 100%")
         self.crop_size_text = tk.StringVar(value="Tamanho do Recorte: N/A")
         self.page_label_text = tk.StringVar(value="Página 1 de 1")
+        self.export_workers = tk.IntVar(value=default_workers())
+        self.fit_mode = tk.StringVar(value="Ajustar")
+        self.output_mode = tk.StringVar(value="Vetorial")
+        self.encoding = tk.StringVar(value="Auto")
+        self.export_dpi = tk.StringVar(value="400")
+        self.autocrop_mode = tk.StringVar(value="Por página")
+        self.autocropper = None
+        self.export_worker = None
+        self.export_success_message = None
+        self.export_status_text = tk.StringVar(value="")
+
+        self.render_cache = RenderCache(budget_mb=float(
+            os.environ.get("PDFCROPPER_CACHE_MB", DEFAULT_BUDGET_MB)))
+        # Cache em disco opcional (PDFCROPPER_DISK_CACHE=diretório)
+        self.disk_cache = DiskRenderCache.from_env()
+        self.fingerprint = None
+        self.debug = bool(os.environ.get("PDFCROPPER_DEBUG"))
+        self.debug_text = tk.StringVar(value="")
+        self.display_list = None
+        self.tile_view = None
+        self.tile_items = {}
+        self.tile_update_pending = False
+        self.view_size = (0, 0)
+        self.page_geometry = {}
+        self.drag_stats = FrameStats()
+        self.prefetcher = None
+        self.nav_direction = 1
+        # Cada exibição ganha uma geração; a versão definitiva de uma prévia só
+        # substitui a imagem se nenhuma exibição mais nova aconteceu
+        self.view_generation = 0
+        self.pending_view = None
+        self.preview_is_blank = False
+        self.refine_poll_pending = False
+        self.thumb_cache = RenderCache(budget_mb=THUMB_CACHE_MB)
+        self.thumb_renderer = None
+        # página -> (ids no canvas, PhotoImage ou None enquanto renderiza)
+        self.thumb_items = {}
+        self.thumb_waiting = set()
+        self.thumb_update_pending = False
+        self.thumb_poll_pending = False
 
         self.create_widgets()
 
@@ -40,6 +125,8 @@ class PDFCropper:
                    command=self.open_pdf).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Salvar PDF",
                    command=self.save_pdf).pack(side=tk.LEFT)
+        ttk.Button(control_frame, text="Salvar Recorte",
+                   command=self.save_crops).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Aplicar a todas",
                    command=self.apply_to_all_pages).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Aplicar às Páginas Selecionadas",
@@ -50,6 +137,10 @@ class PDFCropper:
                    command=self.reset_cropbox).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Limpar Recorte",
                    command=self.clear_crop).pack(side=tk.LEFT)
+        ttk.Button(control_frame, text="Recorte Automático",
+                   command=self.auto_crop).pack(side=tk.LEFT)
+        ttk.Combobox(control_frame, textvariable=self.autocrop_mode, state="readonly",
+                     values=list(AUTOCROP_LABELS), width=10).pack(side=tk.LEFT)
 
         settings_frame = ttk.Frame(self.root)
         settings_frame.pack(side=tk.TOP, fill=tk.X)
@@ -70,7 +161,7 @@ class PDFCropper:
                    command=self.reset_zoom).pack(side=tk.LEFT, padx=5)
 
         ttk.Label(settings_frame,
-                  text="Páginas para Recorte (ex: 1,3-5):").pack(side=tk.LEFT)
+                  text="Páginas para Recorte (ex: 1,3-5, ímpares, pares):").pack(side=tk.LEFT)
         self.pages_entry = ttk.Entry(settings_frame, width=15)
         self.pages_entry.pack(side=tk.LEFT, padx=5)
 
@@ -82,12 +173,49 @@ class PDFCropper:
         ttk.Button(settings_frame, text="Rotacionar 90°",
                    command=self.rotate_page).pack(side=tk.LEFT, padx=5)
 
+        ttk.Label(settings_frame, text="Saída:").pack(side=tk.LEFT)
+        ttk.Combobox(settings_frame, textvariable=self.output_mode, state="readonly",
+                     values=list(OUTPUT_MODE_LABELS), width=14).pack(side=tk.LEFT)
+
+        ttk.Label(settings_frame, text="Ajuste:").pack(side=tk.LEFT)
+        ttk.Combobox(settings_frame, textvariable=self.fit_mode, state="readonly",
+                     values=list(FIT_MODE_LABELS), width=9).pack(side=tk.LEFT)
+
+        ttk.Label(settings_frame, text="Imagem:").pack(side=tk.LEFT)
+        ttk.Combobox(settings_frame, textvariable=self.encoding, state="readonly",
+                     values=list(ENCODING_LABELS), width=6).pack(side=tk.LEFT)
+
+        ttk.Label(settings_frame, text="DPI:").pack(side=tk.LEFT)
+        ttk.Combobox(settings_frame, textvariable=self.export_dpi, state="readonly",
+                     values=DPI_CHOICES, width=5).pack(side=tk.LEFT)
+
+        ttk.Label(settings_frame, text="Processos:").pack(side=tk.LEFT)
+        ttk.Spinbox(settings_frame, from_=1, to=default_workers() * 2,
+                    width=4, textvariable=self.export_workers).pack(side=tk.LEFT)
+
         self.canvas_frame = ttk.Frame(self.root)
         self.canvas_frame.pack(fill=tk.BOTH, expand=False)
 
+        thumb_frame = ttk.Frame(self.canvas_frame)
+        thumb_frame.pack(side=tk.LEFT, fill=tk.Y)
+        self.thumb_canvas = tk.Canvas(
+            thumb_frame, width=THUMB_STRIP_WIDTH, bg="gray85", highlightthickness=0,
+            yscrollincrement=THUMB_ROW_HEIGHT // 4)
+        self.thumb_scrollbar = ttk.Scrollbar(
+            thumb_frame, orient=tk.VERTICAL, command=self.thumb_canvas.yview)
+        self.thumb_canvas.config(yscrollcommand=self.on_thumbnail_scroll)
+        self.thumb_canvas.pack(side=tk.LEFT, fill=tk.Y)
+        self.thumb_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        self.thumb_canvas.bind("<Button-1>", self.on_thumbnail_click)
+        self.thumb_canvas.bind("<Configure>", lambda event: self.schedule_thumbnail_update())
+        self.thumb_canvas.bind("<MouseWheel>", lambda event: self.scroll_thumbnails(
+            -1 if event.delta > 0 else 1))
+        self.thumb_canvas.bind("<Button-4>", lambda event: self.scroll_thumbnails(-1))
+        self.thumb_canvas.bind("<Button-5>", lambda event: self.scroll_thumbnails(1))
+
         self.canvas = tk.Canvas(
             self.canvas_frame, cursor="cross", bg="white", highlightthickness=0)
-        self.canvas.pack(anchor="center")
+        self.canvas.pack(side=tk.LEFT, expand=True)
 
         navigation_frame = ttk.Frame(self.root)
         navigation_frame.pack(side=tk.TOP, fill=tk.X)
@@ -102,6 +230,22 @@ class PDFCropper:
         ttk.Label(navigation_frame, textvariable=self.crop_size_text).pack(
             side=tk.LEFT, padx=5)
 
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.TOP, fill=tk.X)
+
+        self.export_progress = ttk.Progressbar(
+            status_frame, orient=tk.HORIZONTAL, length=200, mode="determinate")
+        self.export_progress.pack(side=tk.LEFT, padx=5)
+        ttk.Label(status_frame, textvariable=self.export_status_text).pack(
+            side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(status_frame, text="Cancelar",
+                                        command=self.cancel_export, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        if self.debug:
+            ttk.Label(status_frame, textvariable=self.debug_text).pack(
+                side=tk.LEFT, padx=5)
+
         self.canvas.bind("<ButtonPress-1>", self.start_drag_or_pan)
         self.canvas.bind("<B1-Motion>", self.do_drag_or_pan)
         self.canvas.bind("<ButtonRelease-1>", self.stop_drag)
@@ -118,30 +262,15 @@ class PDFCropper:
         self.root.bind("<Right>", self.next_page)
 
     def get_target_size(self):
-        target_sizes = {
-            "A4": (595, 842),
-            "A5": (420, 595),
-            "Letter": (612, 792)
-        }
-        return target_sizes[self.page_size.get()]
+        return TARGET_SIZES[self.page_size.get()]
 
     def parse_page_selection(self, page_input):
-        if not page_input:
-            return []
-        pages = set()
         try:
-            for part in page_input.split(","):
-                part = part.strip()
-                if "-" in part:
-                    start, end = map(int, part.split("-"))
-                    pages.update(range(start - 1, end))
-                else:
-                    pages.add(int(part) - 1)
+            return parse_page_selection(page_input)
         except ValueError:
             messagebox.showerror(
                 "Erro", "Entrada de páginas inválida. Use o formato '1,3-5'.")
             return []
-        return sorted(pages)
 
     def apply_to_all_pages(self):
         if not self.doc or not self.crop_rect:
@@ -149,28 +278,8 @@ class PDFCropper:
                 "Aviso", "Nenhum recorte definido para aplicar.")
             return
 
-        page = self.doc.load_page(self.current_page)
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
-        pix_width, pix_height = pix.width, pix.height
-
-        media_width, media_height = page.rect.width, page.rect.height
-
-        scale_x = media_width / (pix_width * self.display_scale)
-        scale_y = media_height / (pix_height * self.display_scale)
-
-        x1, y1, x2, y2 = self.crop_rect
-        crop_rect_real = fitz.Rect(
-            x1 * scale_x,
-            y1 * scale_y,
-            x2 * scale_x,
-            y2 * scale_y
-        )
-
-        for page_num in range(len(self.doc)):
-            page = self.doc.load_page(page_num)
-            if page_num not in self.original_cropboxes:
-                self.original_cropboxes[page_num] = page.cropbox
-            page.set_cropbox(crop_rect_real)
+        self.apply_cropbox(range(len(self.doc)), self.get_crop_cropbox())
+        self.invalidate_renders()
 
         self.last_crop_rect = self.crop_rect
         self.show_page()
@@ -181,45 +290,69 @@ class PDFCropper:
                 "Aviso", "Nenhum recorte definido para aplicar.")
             return
 
-        pages_input = self.pages_entry.get()
-        selected_pages = self.parse_page_selection(pages_input)
+        try:
+            selected_pages = pages_for_rule(self.pages_entry.get(), len(self.doc))
+        except ValueError:
+            messagebox.showerror(
+                "Erro", "Entrada de páginas inválida. Use '1,3-5', 'ímpares' ou 'pares'.")
+            return
         if not selected_pages:
             messagebox.showwarning("Aviso", "Nenhuma página selecionada.")
             return
 
-        page = self.doc.load_page(self.current_page)
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
-        pix_width, pix_height = pix.width, pix.height
+        self.apply_cropbox(selected_pages, self.get_crop_cropbox())
+        self.invalidate_renders(selected_pages)
 
-        media_width, media_height = page.rect.width, page.rect.height
+        self.last_crop_rect = self.crop_rect
+        self.show_page()
 
-        scale_x = media_width / (pix_width * self.display_scale)
-        scale_y = media_height / (pix_height * self.display_scale)
+    def get_crop_cropbox(self):
+        # Recorte desenhado na página atual, nas coordenadas de set_cropbox
+        page = self.doc.load_page(self.current_page)
+        return page_rect_to_cropbox(page, self.get_pdf_rect(self.crop_rect))
 
-        x1, y1, x2, y2 = self.crop_rect
-        crop_rect_real = fitz.Rect(
-            x1 * scale_x,
-            y1 * scale_y,
-            x2 * scale_x,
-            y2 * scale_y
-        )
+    def apply_cropbox(self, page_nums, rect):
+        # Registra o recorte na tabela e o aplica às páginas abertas
+        self.modified_pages.update(apply_crop(self.doc, self.crop_table, page_nums, rect,
+                                              self.original_cropboxes))
 
-        for page_num in selected_pages:
-            if 0 <= page_num < len(self.doc):
-                page = self.doc.load_page(page_num)
-                if page_num not in self.original_cropboxes:
-                    self.original_cropboxes[page_num] = page.cropbox
-                page.set_cropbox(crop_rect_real)
+    def auto_crop(self):
+        if not self.doc:
+            messagebox.showwarning("Aviso", "Nenhum PDF carregado.")
+            return
 
-        self.last_crop_rect = self.crop_rect
-        self.show_page()
+        # Sem páginas informadas, o recorte automático vale para o documento todo
+        pages_input = self.pages_entry.get().strip()
+        if pages_input:
+            try:
+                selected_pages = pages_for_rule(pages_input, len(self.doc))
+            except ValueError:
+                messagebox.showerror(
+                    "Erro", "Entrada de páginas inválida. Use '1,3-5', 'ímpares' ou 'pares'.")
+                return
+            if not selected_pages:
+                messagebox.showwarning("Aviso", "Nenhuma página selecionada.")
+                return
+        else:
+            selected_pages = range(len(self.doc))
+
+        boxes = self.autocropper.bboxes(
+            selected_pages, AUTOCROP_LABELS[self.autocrop_mode.get()])
+        if not boxes:
+            messagebox.showinfo("Aviso", "Nenhum conteúdo encontrado nas páginas.")
+            return
+        for page_num, box in boxes.items():
+            self.apply_cropbox([page_num], box)
+        self.invalidate_renders(list(boxes))
+        # O cropbox já é o recorte; um retângulo desenhado ficaria deslocado
+        self.clear_crop()
 
     def export_selected_pages(self):
         if not self.doc:
             messagebox.showwarning("Aviso", "Nenhum PDF carregado.")
             return
 
-        pages_input = tk.simpledialog.askstring(
+        pages_input = simpledialog.askstring(
             "Exportar Páginas", "Digite as páginas para exportar (ex: 1,3-5):")
         if not pages_input:
             return
@@ -234,116 +367,147 @@ class PDFCropper:
         if not output_path:
             return
 
-        new_doc = fitz.open()
-        base_crop = self.crop_rect if self.crop_rect else (
-            0, 0, self.doc[0].rect.width, self.doc[0].rect.height)
+        selected_pages = [p for p in selected_pages if 0 <= p < len(self.doc)]
+        self.run_export(selected_pages, output_path,
+                        f"Páginas exportadas para: {output_path}")
 
-        # Definir o DPI desejado para exportação
-        desired_dpi = 400
-        scale_factor = desired_dpi / 72  # 72 é o DPI base do PyMuPDF
+    def save_pdf(self):
+        if not self.doc:
+            messagebox.showwarning("Aviso", "Nenhum PDF carregado.")
+            return
 
-        # Ajustar o target_size para o DPI desejado
-        target_size = self.get_target_size()  # Ex.: (595, 842) para A4
-        target_width_inch = target_size[0] / 72  # Largura em polegadas
-        target_height_inch = target_size[1] / 72  # Altura em polegadas
-        target_width_pixels = int(
-            target_width_inch * desired_dpi)  # Largura em pixels
-        target_height_pixels = int(
-            target_height_inch * desired_dpi)  # Altura em pixels
-        adjusted_target_size = (target_width_pixels, target_height_pixels)
+        output_path = filedialog.asksaveasfilename(defaultextension=".pdf")
+        if not output_path:
+            return
 
-        page = self.doc.load_page(self.current_page)
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
-        pix_width, pix_height = pix.width, pix.height
-        media_width, media_height = page.rect.width, page.rect.height
-
-        scale_x = media_width / (pix_width * self.display_scale)
-        scale_y = media_height / (pix_height * self.display_scale)
-
-        x1, y1, x2, y2 = base_crop
-        crop_rect_real = fitz.Rect(
-            x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
-
-        for page_num in selected_pages:
-            if 0 <= page_num < len(self.doc):
-                page = self.doc.load_page(page_num)
-                cropped_page = page.get_pixmap(
-                    clip=crop_rect_real, matrix=fitz.Matrix(scale_factor, scale_factor))
-                img = Image.frombytes(
-                    "RGB", (cropped_page.width, cropped_page.height), cropped_page.samples)
-                resized_img = img.resize(
-                    adjusted_target_size, resample=Image.LANCZOS)
-
-                new_page = new_doc.new_page(
-                    width=target_size[0], height=target_size[1])
-                img_byte_arr = io.BytesIO()
-                resized_img.save(img_byte_arr, format="PNG", quality=100)
-                img_byte_arr = img_byte_arr.getvalue()
-                new_page.insert_image(new_page.rect, stream=img_byte_arr)
-
-        new_doc.save(output_path, deflate=True)
-        new_doc.close()
-        messagebox.showinfo(
-            "Sucesso", f"Páginas exportadas para: {output_path}")
+        self.run_export(range(len(self.doc)), output_path,
+                        f"PDF salvo em: {output_path}")
 
-    def save_pdf(self):
+    def save_crops(self):
+        # Grava só os cropboxes/rotações, sem renderizar: o PDF continua
+        # vetorial. Escolhendo o próprio arquivo, a gravação é incremental.
         if not self.doc:
             messagebox.showwarning("Aviso", "Nenhum PDF carregado.")
             return
 
-        output_path = filedialog.asksaveasfilename(defaultextension=".pdf")
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf", initialfile=os.path.basename(self.doc.name))
         if not output_path:
             return
 
-        new_doc = fitz.open()
+        started = time.perf_counter()
+        try:
+            save_cropboxes(self.doc, output_path)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
+            return
+        messagebox.showinfo(
+            "Sucesso", f"Recortes salvos em: {output_path} "
+                       f"({time.perf_counter() - started:.2f} s)")
+
+    def original_rotation(self, page_num):
+        # /Rotate do arquivo, lido antes de qualquer set_rotation na página:
+        # as páginas só são rotacionadas depois que o estado delas existe
+        rotation = self.original_rotations.get(page_num)
+        if rotation is None:
+            rotation = self.original_rotations[page_num] = self.doc[page_num].rotation
+        return rotation
+
+    def get_export_clip(self):
         base_crop = self.crop_rect if self.crop_rect else (
             0, 0, self.doc[0].rect.width, self.doc[0].rect.height)
 
-        # Definir o DPI desejado
-        desired_dpi = 400
-        scale_factor = desired_dpi / 72  # 72 é o DPI base do PyMuPDF
-
-        # Ajustar o target_size para o DPI desejado
-        target_size = self.get_target_size()  # Ex.: (595, 842) para A4
-        target_width_inch = target_size[0] / 72  # Largura em polegadas
-        target_height_inch = target_size[1] / 72  # Altura em polegadas
-        target_width_pixels = int(
-            target_width_inch * desired_dpi)  # Largura em pixels
-        target_height_pixels = int(
-            target_height_inch * desired_dpi)  # Altura em pixels
-        adjusted_target_size = (target_width_pixels, target_height_pixels)
+        return self.get_pdf_rect(base_crop)
 
+    def get_pdf_rect(self, crop_rect):
+        # Recorte em pixels da janela -> coordenadas da página atual em pontos
         page = self.doc.load_page(self.current_page)
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
-        pix_width, pix_height = pix.width, pix.height
-        media_width, media_height = page.rect.width, page.rect.height
+        return fitz.Rect(page_display_rect_to_pdf(page, crop_rect, self.display_scale))
 
-        scale_x = media_width / (pix_width * self.display_scale)
-        scale_y = media_height / (pix_height * self.display_scale)
+    def get_export_workers(self):
+        try:
+            return max(1, int(self.export_workers.get()))
+        except (tk.TclError, ValueError):
+            return 1
+
+    def get_export_dpi(self):
+        if self.export_dpi.get() == "Auto":
+            return {"dpi_range": (DEFAULT_MIN_DPI, DEFAULT_MAX_DPI)}
+        return {"dpi": int(self.export_dpi.get())}
+
+    def run_export(self, page_nums, output_path, success_message):
+        if self.export_worker and self.export_worker.is_alive():
+            messagebox.showwarning("Aviso", "Já existe uma exportação em andamento.")
+            return
 
-        x1, y1, x2, y2 = base_crop
-        crop_rect_real = fitz.Rect(
-            x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
+        page_nums = list(page_nums)
+        clip = self.get_export_clip()
+        # O snapshot é feito aqui porque o documento fitz não é thread-safe; a
+        # tabela de recortes é copiada pelo mesmo motivo: aplicar ou limpar
+        # recortes durante a exportação não pode alterar o que já começou
+        source_path, is_temp = snapshot_document(self.doc)
+        crop_table = CropTable.from_json(self.crop_table.to_json(), len(self.doc))
+
+        def cleanup():
+            if is_temp and os.path.exists(source_path):
+                os.remove(source_path)
+
+        self.export_worker = ExportWorker(
+            source_path, page_nums, clip, self.get_target_size(), output_path,
+            cleanup=cleanup, mode=OUTPUT_MODE_LABELS[self.output_mode.get()],
+            workers=self.get_export_workers(),
+            fit=FIT_MODE_LABELS[self.fit_mode.get()],
+            encoding=ENCODING_LABELS[self.encoding.get()],
+            crop_table=crop_table, **self.get_export_dpi())
+        self.export_success_message = success_message
+        self.export_progress.config(maximum=max(len(page_nums), 1), value=0)
+        self.export_status_text.set(f"Exportando: 0/{len(page_nums)} páginas")
+        self.cancel_button.config(state=tk.NORMAL)
+        self.export_worker.start()
+        self.root.after(100, self.poll_export_queue)
+
+    def cancel_export(self):
+        if self.export_worker and self.export_worker.is_alive():
+            self.export_worker.cancel()
+            self.export_status_text.set("Cancelando...")
+
+    def format_eta(self, seconds):
+        if seconds is None:
+            return "--:--"
+        minutes, seconds = divmod(int(seconds), 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+    def poll_export_queue(self):
+        worker = self.export_worker
+        while True:
+            try:
+                event = worker.events.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = event[0]
+            if kind == "progress":
+                _, done, total, rate, eta = event
+                self.export_progress.config(value=done)
+                if not worker.cancel_event.is_set():
+                    self.export_status_text.set(
+                        f"Exportando: {done}/{total} páginas — {rate:.1f} pág/s"
+                        f" — restante {self.format_eta(eta)}")
+                continue
+
+            self.cancel_button.config(state=tk.DISABLED)
+            self.export_progress.config(value=0)
+            self.export_status_text.set("")
+            if kind == "done":
+                summary = "\n".join(event[2].summary_lines())
+                messagebox.showinfo("Sucesso", f"{self.export_success_message}\n\n{summary}")
+            elif kind == "cancelled":
+                messagebox.showinfo("Cancelado", "Exportação cancelada.")
+            else:
+                messagebox.showerror("Erro", f"Erro ao exportar: {event[1]}")
+            return
 
-        for page_num in range(len(self.doc)):
-            page = self.doc.load_page(page_num)
-            cropped_page = page.get_pixmap(
-                clip=crop_rect_real, matrix=fitz.Matrix(scale_factor, scale_factor))
-            img = Image.frombytes(
-                "RGB", (cropped_page.width, cropped_page.height), cropped_page.samples)
-            resized_img = img.resize(
-                adjusted_target_size, resample=Image.LANCZOS)
-
-            new_page = new_doc.new_page(
-                width=target_size[0], height=target_size[1])
-            img_byte_arr = io.BytesIO()
-            resized_img.save(img_byte_arr, format="PNG", quality=100)
-            img_byte_arr = img_byte_arr.getvalue()
-            new_page.insert_image(new_page.rect, stream=img_byte_arr)
-
-        new_doc.save(output_path, deflate=True)
-        new_doc.close()
-        messagebox.showinfo("Sucesso", f"PDF salvo em: {output_path}")
+        self.root.after(100, self.poll_export_queue)
 
     def save_settings(self):
         if not self.doc:
@@ -357,7 +521,8 @@ class PDFCropper:
 
         settings = {
             "crop_rect": self.crop_rect,
-            "page_states": self.page_states
+            "page_states": self.page_states,
+            "crop_table": self.crop_table.to_json()
         }
         with open(output_path, "w") as f:
             json.dump(settings, f, indent=4)
@@ -378,9 +543,22 @@ class PDFCropper:
             with open(input_path, "r") as f:
                 settings = json.load(f)
             self.crop_rect = settings.get("crop_rect")
-            self.page_states = settings.get("page_states", {})
-            self.zoom_level.set(self.page_states.get(
-                self.current_page, {"scale_factor": 1.0})["scale_factor"])
+            self.page_states = PageStates(self.original_rotation)
+            for page_num, state in settings.get("page_states", {}).items():
+                page_num = int(page_num)
+                if not 0 <= page_num < len(self.doc):
+                    continue
+                self.page_states[page_num].update(state)
+                rotation = state.get("rotation", self.original_rotation(page_num))
+                if rotation != self.original_rotation(page_num):
+                    self.doc.load_page(page_num).set_rotation(rotation)
+                    self.modified_pages.add(page_num)
+            if settings.get("crop_table"):
+                table = CropTable.from_json(settings["crop_table"], len(self.doc))
+                for page_num in table.pages():
+                    self.apply_cropbox([page_num], table.get(page_num))
+                self.invalidate_renders()
+            self.zoom_level.set(self.page_states[self.current_page]["scale_factor"])
             self.show_page()
             messagebox.showinfo(
                 "Sucesso", f"Configurações carregadas de: {input_path}")
@@ -391,15 +569,18 @@ class PDFCropper:
     def reset_cropbox(self):
         if not self.doc:
             return
-        for page_num in range(len(self.doc)):
+        # Só as páginas alteradas (recorte ou rotação) precisam ser restauradas
+        for page_num in self.modified_pages:
             page = self.doc.load_page(page_num)
             if page_num in self.original_cropboxes:
                 page.set_cropbox(self.original_cropboxes[page_num])
-            else:
-                page.set_cropbox(page.rect)
-            # Corrigido: Inclui a chave "rotation" ao redefinir o estado da página
-            self.page_states[page_num] = {
-                "scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0}
+            if page.rotation != self.original_rotation(page_num):
+                page.set_rotation(self.original_rotation(page_num))
+        self.modified_pages.clear()
+        self.original_cropboxes.clear()
+        self.page_states = PageStates(self.original_rotation)
+        self.crop_table.clear()
+        self.invalidate_renders()
         self.crop_rect = None
         self.last_crop_rect = None
         if self.rect_id:
@@ -421,53 +602,77 @@ class PDFCropper:
             filetypes=[("PDF Files", "*.pdf")])
         if not file_path:
             return
+        if self.prefetcher:
+            self.prefetcher.stop()
         self.doc = fitz.open(file_path)
-        self.original_cropboxes = {
-            i: self.doc[i].cropbox for i in range(len(self.doc))}
-
-        self.page_states = {
-            i: {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0}
-            for i in range(len(self.doc))
-        }
+        self.fingerprint = file_fingerprint(file_path) if self.disk_cache else None
+        self.autocropper = AutoCropper(self.doc)
+        self.crop_table = CropTable(len(self.doc))
+        self.invalidate_renders()
+        self.prefetcher = PagePrefetcher(file_path, self.render_cache,
+                                         self.disk_cache, self.fingerprint)
+        self.prefetcher.start()
+        if self.thumb_renderer:
+            self.thumb_renderer.stop()
+        self.thumb_renderer = ThumbnailRenderer(file_path, self.thumb_cache,
+                                                self.disk_cache, self.fingerprint)
+        self.thumb_renderer.start()
+        self.nav_direction = 1
+        # Nada é lido por página aqui: estados e cropboxes originais são
+        # criados quando a página é exibida ou alterada
+        self.original_cropboxes = {}
+        self.original_rotations = {}
+        self.modified_pages = set()
+        self.page_states = PageStates(self.original_rotation)
 
         self.current_page = 0
         self.zoom_level.set(1.0)
         self.update_page_label()
+        self.thumb_canvas.config(
+            scrollregion=(0, 0, THUMB_STRIP_WIDTH, len(self.doc) * THUMB_ROW_HEIGHT))
+        self.thumb_canvas.yview_moveto(0)
         self.show_page()
+        self.schedule_prefetch()
+        self.schedule_thumbnail_update()
 
     def show_page(self):
         if not self.doc:
             return
+        started = time.perf_counter()
 
-        page = self.doc.load_page(self.current_page)
-        page_state = self.page_states.get(
-            self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+        page_state = self.page_states[self.current_page]
         rotation = page_state["rotation"]
-        page.set_rotation(rotation)
-
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
-        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        load_rotated(self.doc, self.current_page, rotation)
 
         scale_factor = page_state["scale_factor"]
         x_offset = page_state["x_offset"]
         y_offset = page_state["y_offset"]
 
-        base_width = int(pix.width * self.display_scale)
-        base_height = int(pix.height * self.display_scale)
-
-        resized_width = int(base_width * scale_factor)
-        resized_height = int(base_height * scale_factor)
-        img = img.resize((resized_width, resized_height),
-                         Image.Resampling.LANCZOS)
-        self.tk_img = ImageTk.PhotoImage(img)
+        (base_width, base_height), (resized_width, resized_height) = view_sizes(
+            self.get_page_size(self.current_page, rotation), self.display_scale,
+            scale_factor)
 
         self.canvas.config(width=base_width, height=base_height)
         self.canvas.config(scrollregion=(0, 0, base_width, base_height))
+        self.view_size = (base_width, base_height)
 
         self.canvas.delete("all")
-        self.current_item_id = self.canvas.create_image(
-            x_offset, y_offset, anchor="nw", image=self.tk_img
-        )
+        self.tile_items = {}
+        self.view_generation += 1
+        self.pending_view = None
+        if scale_factor > TILE_ZOOM_THRESHOLD:
+            # Zoom alto: renderiza só os blocos visíveis em vez da página inteira
+            self.current_item_id = None
+            self.tile_view = (self.current_page, rotation, scale_factor,
+                              (resized_width, resized_height))
+            self.update_tiles()
+        else:
+            self.tile_view = None
+            self.tk_img = self.get_progressive_image(
+                self.current_page, rotation, scale_factor, (resized_width, resized_height))
+            self.current_item_id = self.canvas.create_image(
+                x_offset, y_offset, anchor="nw", image=self.tk_img, tags=("page",)
+            )
 
         if self.crop_rect and not self.rect_id:
             x1, y1, x2, y2 = self.crop_rect
@@ -481,12 +686,197 @@ class PDFCropper:
                 outline="red"
             )
 
-        control_frame_height = 60
-        window_width = base_width + 20
+        self.thumb_canvas.config(height=base_height)
+        self.highlight_thumbnail()
+
+        control_frame_height = 90
+        window_width = base_width + THUMB_STRIP_WIDTH + 40
         window_height = base_height + control_frame_height + 20
         self.root.geometry(f"{window_width}x{window_height}")
 
         self.update_page_label()
+        if self.debug:
+            self.debug_text.set(self.cache_stats_text())
+        trace.record("show_page", started, page=self.current_page + 1)
+
+    def cache_stats_text(self):
+        text = self.render_cache.stats_text()
+        if self.disk_cache:
+            text += f" | {self.disk_cache.stats_text()}"
+        return text
+
+    def get_base_image(self, page_num, rotation):
+        # Página renderizada em Matrix(1, 1), reaproveitada entre zooms e navegação
+        key = ("base", page_num, rotation, 1.0)
+        img = self.render_cache.get(key)
+        if img is None:
+            page = load_rotated(self.doc, page_num, rotation)
+            if self.disk_cache:
+                stored_key = disk_key(self.fingerprint, key, page.cropbox)
+                with trace.span("disk_cache", page=page_num + 1):
+                    img = self.disk_cache.get(stored_key)
+            if img is None:
+                img, pix = base_image(page)
+                if self.disk_cache:
+                    self.disk_cache.put(stored_key, pix)
+            self.render_cache.put(key, img, img.width * img.height * 3)
+        return img
+
+    def invalidate_renders(self, page_nums=None):
+        if self.prefetcher:
+            # Uma renderização em andamento usaria o cropbox antigo
+            self.prefetcher.cancel()
+        if page_nums is None:
+            self.render_cache.clear()
+        else:
+            self.render_cache.discard_pages(page_nums)
+        self.display_list = None
+        self.refresh_thumbnails(page_nums)
+        if page_nums is None:
+            self.page_geometry.clear()
+        else:
+            page_nums = set(page_nums)
+            for key in [k for k in self.page_geometry if k[0] in page_nums]:
+                del self.page_geometry[key]
+
+    def get_page_size(self, page_num, rotation=None):
+        # Tamanho em pixels da página em Matrix(1, 1), calculado sem renderizar
+        if rotation is None:
+            rotation = self.page_states.rotation(page_num)
+        key = (page_num, rotation)
+        size = self.page_geometry.get(key)
+        if size is None:
+            size = page_pixel_size(load_rotated(self.doc, page_num, rotation))
+            self.page_geometry[key] = size
+        return size
+
+    def get_display_list(self, page_num, rotation):
+        # A lista de exibição evita reinterpretar a página inteira a cada bloco
+        key = (page_num, rotation)
+        if self.display_list is None or self.display_list[0] != key:
+            page = load_rotated(self.doc, page_num, rotation)
+            self.display_list = (key, page.get_displaylist())
+        return self.display_list[1]
+
+    def get_tile_image(self, page_num, rotation, scale_factor, tile, image_size):
+        key = ("tile", page_num, rotation, round(scale_factor, 4), tile)
+        tk_img = self.render_cache.get(key)
+        if tk_img is None:
+            zoom = self.display_scale * scale_factor
+            clip = fitz.Rect(tile_clip(tile, zoom, image_size))
+            # A translação leva o canto do bloco à origem do pixmap
+            matrix = fitz.Matrix(zoom, 0, 0, zoom, -clip.x0 * zoom, -clip.y0 * zoom)
+            with trace.span("tile_pixmap", page=page_num + 1) as span:
+                pix = self.get_display_list(page_num, rotation).get_pixmap(
+                    matrix=matrix, clip=clip)
+                span.add(bytes=len(pix.samples_mv))
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            with trace.span("photoimage", page=page_num + 1):
+                tk_img = ImageTk.PhotoImage(img)
+            self.render_cache.put(key, tk_img, pix.width * pix.height * 4)
+        return tk_img
+
+    def update_tiles(self):
+        self.tile_update_pending = False
+        if not self.tile_view:
+            return
+        page_num, rotation, scale_factor, image_size = self.tile_view
+        page_state = self.page_states[page_num]
+        x_offset = page_state["x_offset"]
+        y_offset = page_state["y_offset"]
+
+        visible = set(visible_tiles(image_size, (x_offset, y_offset), self.view_size))
+        for tile in [t for t in self.tile_items if t not in visible]:
+            self.canvas.delete(self.tile_items.pop(tile)[0])
+        for tile in visible:
+            if tile in self.tile_items:
+                continue
+            tk_img = self.get_tile_image(page_num, rotation, scale_factor, tile, image_size)
+            item_id = self.canvas.create_image(
+                x_offset + tile[0] * TILE_SIZE, y_offset + tile[1] * TILE_SIZE,
+                anchor="nw", image=tk_img, tags=("page",))
+            # Mantém a referência: o bloco pode sair do cache enquanto está visível
+            self.tile_items[tile] = (item_id, tk_img)
+        self.canvas.tag_lower("page")
+        if self.debug:
+            self.debug_text.set(self.cache_stats_text())
+
+    def schedule_tile_update(self):
+        if self.tile_view and not self.tile_update_pending:
+            self.tile_update_pending = True
+            self.root.after_idle(self.update_tiles)
+
+    def get_view_image(self, page_num, rotation, scale_factor, size):
+        key = ("view", page_num, rotation, round(scale_factor, 4))
+        tk_img = self.render_cache.get(key)
+        if tk_img is None:
+            img = resize_view(self.get_base_image(page_num, rotation), size, page_num)
+            with trace.span("photoimage", page=page_num + 1):
+                tk_img = ImageTk.PhotoImage(img)
+            self.render_cache.put(key, tk_img, size[0] * size[1] * 4)
+        return tk_img
+
+    def get_progressive_image(self, page_num, rotation, scale_factor, size):
+        # Página ainda não renderizada: o pré-carregamento a renderiza fora da
+        # thread do Tk. Se não ficar pronta em PREVIEW_WAIT_MS, pinta a
+        # miniatura ampliada (ou uma página em branco) e troca pela versão
+        # definitiva em poll_refine.
+        key = ("base", page_num, rotation, 1.0)
+        if key not in self.render_cache and self.prefetcher:
+            self.schedule_prefetch()
+            task = (page_num, rotation, tuple(self.doc[page_num].cropbox))
+            if self.prefetcher.has_failed(task):
+                return self.get_view_image(page_num, rotation, scale_factor, size)
+            if not self.prefetcher.wait_rendered(task, PREVIEW_WAIT_MS / 1000):
+                self.pending_view = (self.view_generation, page_num, rotation,
+                                     scale_factor, size)
+                self.schedule_refine_poll()
+                return self.get_preview_image(page_num, rotation, size)
+        return self.get_view_image(page_num, rotation, scale_factor, size)
+
+    def preview_key(self, page_num, rotation):
+        return thumbnail_key(page_num, rotation, tuple(self.doc[page_num].cropbox))
+
+    def get_preview_image(self, page_num, rotation, size):
+        thumb = self.thumb_cache.get(self.preview_key(page_num, rotation))
+        with trace.span("preview", page=page_num + 1, thumbnail=thumb is not None):
+            if thumb is None:
+                img = Image.new("RGB", size, "white")
+            else:
+                img = thumb.resize(size, Image.Resampling.BILINEAR)
+            tk_img = ImageTk.PhotoImage(img)
+        self.preview_is_blank = thumb is None
+        return tk_img
+
+    def schedule_refine_poll(self):
+        if self.pending_view and not self.refine_poll_pending:
+            self.refine_poll_pending = True
+            self.root.after(REFINE_POLL_MS, self.poll_refine)
+
+    def poll_refine(self):
+        self.refine_poll_pending = False
+        if not self.pending_view or self.pending_view[0] != self.view_generation:
+            # Substituída por outra exibição (navegação, zoom, recorte)
+            self.pending_view = None
+            return
+        _, page_num, rotation, scale_factor, size = self.pending_view
+        task = (page_num, rotation, tuple(self.doc[page_num].cropbox))
+        if (("base", page_num, rotation, 1.0) not in self.render_cache
+                and not self.prefetcher.has_failed(task)):
+            # Um cancelamento (recorte, salto) pode ter descartado a renderização
+            self.schedule_prefetch()
+            if (self.preview_is_blank
+                    and self.preview_key(page_num, rotation) in self.thumb_cache):
+                # A miniatura ficou pronta antes da página: melhor que o branco
+                self.tk_img = self.get_preview_image(page_num, rotation, size)
+                self.canvas.itemconfig(self.current_item_id, image=self.tk_img)
+            self.schedule_refine_poll()
+            return
+        # Pronta no cache ou, se o processo de renderização falhou nela,
+        # renderizada aqui mesmo
+        self.pending_view = None
+        self.tk_img = self.get_view_image(page_num, rotation, scale_factor, size)
+        self.canvas.itemconfig(self.current_item_id, image=self.tk_img)
 
     def update_page_label(self):
         if self.doc:
@@ -509,31 +899,25 @@ class PDFCropper:
     def update_zoom_from_slider(self, value):
         if not self.doc:
             return
-        page_state = self.page_states.get(
-            self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+        page_state = self.page_states[self.current_page]
         page_state["scale_factor"] = float(value)
-        self.page_states[self.current_page] = page_state
         self.show_page()
         self.update_zoom_label()
 
     def adjust_zoom(self, zoom_factor):
-        page_state = self.page_states.get(
-            self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+        page_state = self.page_states[self.current_page]
         current_scale = page_state["scale_factor"]
         new_scale = current_scale * zoom_factor
         new_scale = max(0.1, min(new_scale, 5.0))
         page_state["scale_factor"] = new_scale
-        self.page_states[self.current_page] = page_state
         self.show_page()
 
     def reset_zoom(self):
         if not self.doc:
             return
         self.zoom_level.set(1.0)
-        page_state = self.page_states.get(
-            self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+        page_state = self.page_states[self.current_page]
         page_state["scale_factor"] = 1.0
-        self.page_states[self.current_page] = page_state
         self.show_page()
         self.update_zoom_label()
 
@@ -544,15 +928,16 @@ class PDFCropper:
     def rotate_page(self):
         if not self.doc:
             return
-        page_state = self.page_states.get(
-            self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+        page_state = self.page_states[self.current_page]
         current_rotation = page_state.get("rotation", 0)
         new_rotation = (current_rotation + 90) % 360
         page_state["rotation"] = new_rotation
-        self.page_states[self.current_page] = page_state
+        self.modified_pages.add(self.current_page)
+        self.refresh_thumbnails([self.current_page])
         self.show_page()
 
     def start_drag_or_pan(self, event):
+        self.drag_stats.reset()
         if event.state & 0x0001:  # Shift para panning
             self.pan_start = (event.x, event.y)
         else:
@@ -561,24 +946,25 @@ class PDFCropper:
                 self.canvas.delete(self.rect_id)
             if self.overlay_id:
                 self.canvas.delete(self.overlay_id)
+                self.overlay_id = None
             self.rect_id = self.canvas.create_rectangle(
                 event.x, event.y, event.x, event.y, outline="red"
             )
 
     def do_drag_or_pan(self, event):
+        started = time.perf_counter()
         if self.pan_start:
             delta_x = event.x - self.pan_start[0]
             delta_y = event.y - self.pan_start[1]
 
-            page_state = self.page_states.get(
-                self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+            page_state = self.page_states[self.current_page]
             page_state["x_offset"] += delta_x
             page_state["y_offset"] += delta_y
-            self.page_states[self.current_page] = page_state
 
-            self.canvas.move(self.current_item_id, delta_x, delta_y)
+            self.canvas.move("page", delta_x, delta_y)
             if self.rect_id:
                 self.canvas.move(self.rect_id, delta_x, delta_y)
+            self.schedule_tile_update()
 
             self.pan_start = (event.x, event.y)
         elif self.drag_start:
@@ -591,35 +977,28 @@ class PDFCropper:
             self.crop_size_text.set(
                 f"Tamanho do Recorte: {int(width)}x{int(height)} px")
 
-            if self.overlay_id:
-                self.canvas.delete(self.overlay_id)
-            page_state = self.page_states.get(
-                self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
-            scale_factor = page_state["scale_factor"]
-            base_width = int(self.doc.load_page(self.current_page).get_pixmap(
-                matrix=fitz.Matrix(1, 1)).width * self.display_scale)
-            base_height = int(self.doc.load_page(self.current_page).get_pixmap(
-                matrix=fitz.Matrix(1, 1)).height * self.display_scale)
-            resized_width = int(base_width * scale_factor)
-            resized_height = int(base_height * scale_factor)
-
-            self.overlay_id = self.canvas.create_rectangle(
-                0, 0, resized_width, resized_height,
-                fill="gray", stipple="gray50", outline=""
-            )
-            self.canvas.tag_lower(self.overlay_id, self.rect_id)
-            self.canvas.create_rectangle(
-                min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1),
-                fill="", outline=""
-            )
+            if not self.overlay_id:
+                page_state = self.page_states[self.current_page]
+                scale_factor = page_state["scale_factor"]
+                pix_width, pix_height = self.get_page_size(self.current_page)
+                base_width = int(pix_width * self.display_scale)
+                base_height = int(pix_height * self.display_scale)
+                resized_width = int(base_width * scale_factor)
+                resized_height = int(base_height * scale_factor)
+
+                self.overlay_id = self.canvas.create_rectangle(
+                    0, 0, resized_width, resized_height,
+                    fill="gray", stipple="gray50", outline=""
+                )
+                self.canvas.tag_lower(self.overlay_id, self.rect_id)
+        self.drag_stats.record(started)
 
     def stop_drag(self, event):
         if self.drag_start:
             x0, y0 = self.drag_start
             x1, y1 = event.x, event.y
 
-            page_state = self.page_states.get(
-                self.current_page, {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0})
+            page_state = self.page_states[self.current_page]
             scale_factor = page_state["scale_factor"]
             x_offset = page_state["x_offset"]
             y_offset = page_state["y_offset"]
@@ -638,27 +1017,169 @@ class PDFCropper:
             self.show_page()
         elif self.pan_start:
             self.pan_start = None
+        if self.debug:
+            self.debug_text.set(
+                f"{self.cache_stats_text()} | {self.drag_stats.summary('Arraste')}")
 
     def apply_crop(self, img, crop_rect):
         x1, y1, x2, y2 = [int(v) for v in crop_rect]
         return img.crop((x1, y1, x2, y2))
 
+    def go_to_page(self, page_num):
+        if not self.doc or not 0 <= page_num < len(self.doc) or page_num == self.current_page:
+            return
+        step = page_num - self.current_page
+        if abs(step) > 1 and self.prefetcher:
+            # Salto: as páginas vizinhas da posição anterior não interessam mais
+            self.prefetcher.cancel()
+        self.nav_direction = 1 if step > 0 else -1
+        self.current_page = page_num
+        self.zoom_level.set(
+            self.page_states[self.current_page]["scale_factor"])
+        self.show_page()
+        self.scroll_to_thumbnail(page_num)
+        self.schedule_prefetch()
+
+    def schedule_prefetch(self):
+        if not self.doc or not self.prefetcher:
+            return
+        # A página atual vem primeiro: sem ela a tela fica só com a prévia
+        tasks = []
+        for page_num in [self.current_page] + prefetch_order(
+                self.current_page, self.nav_direction, len(self.doc)):
+            rotation = self.page_states.rotation(page_num)
+            if ("base", page_num, rotation, 1.0) not in self.render_cache:
+                tasks.append((page_num, rotation, tuple(self.doc[page_num].cropbox)))
+        self.prefetcher.request(tasks)
+
+    def on_thumbnail_scroll(self, first, last):
+        self.thumb_scrollbar.set(first, last)
+        self.schedule_thumbnail_update()
+
+    def scroll_thumbnails(self, units):
+        self.thumb_canvas.yview_scroll(units * 2, "units")
+
+    def scroll_to_thumbnail(self, page_num):
+        top = self.thumb_canvas.canvasy(0)
+        height = self.thumb_canvas.winfo_height()
+        row_top = page_num * THUMB_ROW_HEIGHT
+        if row_top < top or row_top + THUMB_ROW_HEIGHT > top + height:
+            self.thumb_canvas.yview_moveto(row_top / (len(self.doc) * THUMB_ROW_HEIGHT))
+
+    def on_thumbnail_click(self, event):
+        if self.doc:
+            self.go_to_page(int(self.thumb_canvas.canvasy(event.y) // THUMB_ROW_HEIGHT))
+
+    def schedule_thumbnail_update(self):
+        if self.doc and not self.thumb_update_pending:
+            self.thumb_update_pending = True
+            self.root.after_idle(self.update_thumbnails)
+
+    def update_thumbnails(self):
+        # Só as linhas visíveis da faixa têm itens no canvas; as demais
+        # miniaturas ficam (ou não) no cache
+        self.thumb_update_pending = False
+        if not self.doc:
+            return
+        visible = thumbnail_range(self.thumb_canvas.canvasy(0),
+                                  self.thumb_canvas.winfo_height(), len(self.doc))
+        for page_num in [p for p in self.thumb_items if p not in visible]:
+            for item_id in self.thumb_items.pop(page_num)[0]:
+                self.thumb_canvas.delete(item_id)
+
+        tasks = []
+        for page_num in visible:
+            if page_num not in self.thumb_items:
+                y = page_num * THUMB_ROW_HEIGHT + THUMB_PAD
+                frame_id = self.thumb_canvas.create_rectangle(
+                    THUMB_PAD - 2, y - 2, THUMB_STRIP_WIDTH - THUMB_PAD + 2,
+                    y + THUMB_HEIGHT + 2, outline="gray60")
+                label_id = self.thumb_canvas.create_text(
+                    THUMB_STRIP_WIDTH // 2, y + THUMB_HEIGHT + THUMB_PAD + 2,
+                    text=str(page_num + 1))
+                self.thumb_items[page_num] = ([frame_id, label_id], None)
+            if self.thumb_items[page_num][1] is None:
+                rotation = self.page_states.rotation(page_num)
+                cropbox = tuple(self.doc[page_num].cropbox)
+                img = self.thumb_cache.get(thumbnail_key(page_num, rotation, cropbox))
+                if img is None:
+                    tasks.append((page_num, rotation, cropbox))
+                else:
+                    self.show_thumbnail(page_num, img)
+        self.thumb_waiting = {task[0] for task in tasks}
+        self.thumb_renderer.request(tasks)
+        self.highlight_thumbnail()
+        self.schedule_thumbnail_poll()
+
+    def schedule_thumbnail_poll(self):
+        if self.thumb_waiting and not self.thumb_poll_pending:
+            self.thumb_poll_pending = True
+            self.root.after(50, self.poll_thumbnails)
+
+    def poll_thumbnails(self):
+        self.thumb_poll_pending = False
+        while True:
+            try:
+                page_num = self.thumb_renderer.done.get_nowait()
+            except queue.Empty:
+                break
+            self.thumb_waiting.discard(page_num)
+            if page_num not in self.thumb_items or self.thumb_items[page_num][1]:
+                continue
+            # Uma renderização com rotação ou cropbox antigos não casa com a chave
+            key = thumbnail_key(page_num, self.page_states.rotation(page_num),
+                                tuple(self.doc[page_num].cropbox))
+            img = self.thumb_cache.get(key)
+            if img is not None:
+                self.show_thumbnail(page_num, img)
+        self.schedule_thumbnail_poll()
+
+    def show_thumbnail(self, page_num, img):
+        item_ids, _ = self.thumb_items[page_num]
+        tk_img = ImageTk.PhotoImage(img)
+        x = (THUMB_STRIP_WIDTH - img.width) // 2
+        y = page_num * THUMB_ROW_HEIGHT + THUMB_PAD + (THUMB_HEIGHT - img.height) // 2
+        image_id = self.thumb_canvas.create_image(x, y, anchor="nw", image=tk_img)
+        self.thumb_items[page_num] = (item_ids + [image_id], tk_img)
+
+    def refresh_thumbnails(self, page_nums=None):
+        # Recorte ou rotação mudaram: descarta as miniaturas dessas páginas
+        if page_nums is None:
+            self.thumb_cache.clear()
+            page_nums = list(self.thumb_items)
+        else:
+            page_nums = set(page_nums)
+            self.thumb_cache.discard_pages(page_nums)
+        for page_num in [p for p in self.thumb_items if p in page_nums]:
+            for item_id in self.thumb_items.pop(page_num)[0]:
+                self.thumb_canvas.delete(item_id)
+        self.schedule_thumbnail_update()
+
+    def highlight_thumbnail(self):
+        for page_num, (item_ids, _) in self.thumb_items.items():
+            current = page_num == self.current_page
+            self.thumb_canvas.itemconfig(item_ids[0], outline="red" if current else "gray60",
+                                         width=2 if current else 1)
+
     def next_page(self, event=None):
         if self.doc and self.current_page < len(self.doc) - 1:
-            self.current_page += 1
-            self.zoom_level.set(
-                self.page_states[self.current_page]["scale_factor"])
-            self.show_page()
+            self.go_to_page(self.current_page + 1)
 
     def prev_page(self, event=None):
         if self.doc and self.current_page > 0:
-            self.current_page -= 1
-            self.zoom_level.set(
-                self.page_states[self.current_page]["scale_factor"])
-            self.show_page()
+            self.go_to_page(self.current_page - 1)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    # PDFCROPPER_TRACE=arquivo grava as etapas de exibição e exportação
+    trace.enable_from_env()
     root = tk.Tk()
     app = PDFCropper(root)
     root.mainloop()
+    # A exportação roda em outro processo: fechar a janela a cancela
+    if app.export_worker is not None:
+        app.export_worker.cancel()
+        app.export_worker.join()
+    for line in trace.finish():
+        print(line)
@@ -0,0 +1,53 @@
+# Mede o tempo de inicialização de um interpretador novo importando cada ponto
+# de entrada, para acompanhar o custo de imports pesados (fitz, PIL, tkinter).
+#
+#   python benchmarks/bench_import.py [--runs 10]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "python (vazio)": "pass",
+    "pdfcropper": "import pdfcropper",
+    "pdfcropper.export": "import pdfcropper.export",
+    "pdfcropper.cli": "import pdfcropper.cli",
+    "script da janela": "import Corta_pdf_Ajusta_Tamanho_do_conteudo",
+    "fitz + PIL + tkinter (referência)":
+        "import fitz, PIL.ImageTk, tkinter.ttk, tkinter.filedialog",
+}
+
+HEAVY = ("fitz", "PIL", "tkinter")
+
+
+def time_import(code, runs):
+    probe = (f"{code}\nimport sys\n"
+             f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    samples = []
+    loaded = ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(time.perf_counter() - started)
+        loaded = output.strip().splitlines()[-1] if output.strip() else ""
+    return statistics.median(samples), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, code in TARGETS.items():
+        median, loaded = time_import(code, args.runs)
+        print(f"{label:>36}: {median * 1000:7.1f} ms  "
+              f"(carregados: {loaded or 'nenhum'})")
+
+
+if __name__ == "__main__":
+    main()
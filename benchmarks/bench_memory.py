@@ -0,0 +1,92 @@
+# Pico de RSS da exportação raster em função do número de páginas, comparando
+# a gravação única no final com a gravação em segmentos limitados só por
+# páginas e por páginas e bytes de imagem (o padrão). O padrão mede PNG a
+# 400 dpi, o pior caso de memória: cada página A4 fica com ~45 MB
+# decodificados no documento até a gravação, então a gravação única de 60
+# páginas já passa de 2,5 GB.
+#
+#   python benchmarks/bench_memory.py [--pages 10 60] [--dpi 400]
+#
+# Cada medição roda em um subprocesso novo (ru_maxrss é o pico do processo).
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdfcropper.core import lazy_import  # noqa: E402
+from pdfcropper.export import (  # noqa: E402
+    DEFAULT_SEGMENT_BYTES, DEFAULT_SEGMENT_PAGES, export_pages)
+
+fitz = lazy_import("fitz")
+
+
+def make_document(path, pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 72), f"Página {i + 1}", fontsize=24)
+        for k in range(20):
+            page.draw_rect(fitz.Rect(60 + k * 20, 120 + k * 25, 300 + k * 10, 700),
+                           color=(k / 20, 0.2, 1 - k / 20), width=2)
+    doc.save(path)
+    doc.close()
+
+
+def run_one(path, pages, dpi, encoding, segment_pages, segment_bytes):
+    output = path + ".out.pdf"
+    started = time.perf_counter()
+    export_pages(path, range(pages), (0, 0, 595, 842), (595, 842), output,
+                 mode="raster", dpi=dpi, encoding=encoding,
+                 segment_pages=segment_pages, segment_bytes=segment_bytes)
+    print(json.dumps({
+        "seconds": time.perf_counter() - started,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "output_mb": os.path.getsize(output) / 1024 / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 60])
+    parser.add_argument("--dpi", type=int, default=400)
+    parser.add_argument("--encoding", default="png")
+    parser.add_argument("--segment-pages", type=int, default=DEFAULT_SEGMENT_PAGES)
+    parser.add_argument("--segment-mb", type=int,
+                        default=DEFAULT_SEGMENT_BYTES // (1024 * 1024))
+    parser.add_argument("--child", nargs=3,
+                        metavar=("PDF", "SEGMENT_PAGES", "SEGMENT_BYTES"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_one(args.child[0], args.pages[0], args.dpi, args.encoding,
+                int(args.child[1]), int(args.child[2]))
+        return
+
+    variants = [("único", 0, 0),
+                (f"{args.segment_pages} pág.", args.segment_pages, 0),
+                (f"{args.segment_pages} pág./{args.segment_mb} MB", args.segment_pages,
+                 args.segment_mb * 1024 * 1024)]
+    print(f"{'páginas':>8} {'segmento':>18} {'pico RSS (MB)':>14} {'tempo (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"bench_{pages}.pdf")
+            make_document(path, pages)
+            for label, segment_pages, segment_bytes in variants:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--pages", str(pages), "--dpi",
+                     str(args.dpi), "--encoding", args.encoding, "--child", path,
+                     str(segment_pages), str(segment_bytes)],
+                    check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{pages:>8} {label:>18} {result['peak_rss_mb']:>14.1f} "
+                      f"{result['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Latência de abertura: tempo até a primeira página ficar pronta para exibir,
+# comparando a inicialização antiga (cropbox e estado de todas as páginas na
+# abertura) com a preguiçosa usada hoje pela janela.
+#
+#   python benchmarks/bench_open.py [--pages 100 1000 10000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdfcropper.core import PageStates, lazy_import  # noqa: E402
+from pdfcropper.croptable import CropTable  # noqa: E402
+
+fitz = lazy_import("fitz")
+
+
+def make_document(path, pages):
+    # Uma página de texto replicada dobrando o documento: gerar 10 mil páginas
+    # uma a uma levaria mais que a própria medição
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((72, 72), "Página de teste " * 4, fontsize=11)
+    page.draw_rect(fitz.Rect(72, 100, 523, 770), color=(0, 0, 0))
+    while len(doc) < pages:
+        copy = fitz.open()
+        copy.insert_pdf(doc, to_page=min(len(doc), pages - len(doc)) - 1)
+        doc.insert_pdf(copy)
+        copy.close()
+    doc.save(path)
+    doc.close()
+
+
+def first_page(doc, page_states):
+    page = doc.load_page(0)
+    page.set_rotation(page_states[0]["rotation"])
+    return page.get_pixmap(matrix=fitz.Matrix(1, 1))
+
+
+def open_eager(path):
+    doc = fitz.open(path)
+    original_cropboxes = {i: doc[i].cropbox for i in range(len(doc))}
+    page_states = {i: {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0, "rotation": 0}
+                   for i in range(len(doc))}
+    first_page(doc, page_states)
+    return doc, original_cropboxes
+
+
+def open_lazy(path):
+    doc = fitz.open(path)
+    crop_table = CropTable(len(doc))
+    first_page(doc, PageStates())
+    return doc, crop_table
+
+
+def measure(open_document, path, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        doc, _ = open_document(path)
+        elapsed = time.perf_counter() - started
+        doc.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'páginas':>8} {'antigo (ms)':>12} {'preguiçoso (ms)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"open_{pages}.pdf")
+            make_document(path, pages)
+            eager = measure(open_eager, path, args.repeat)
+            lazy = measure(open_lazy, path, args.repeat)
+            print(f"{pages:>8} {eager * 1000:>12.1f} {lazy * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Compara a exportação antiga (render a 400 DPI + resize LANCZOS) com a
+# renderização direta no tamanho alvo de pdfcropper.export.render_page.
+#
+#   python benchmarks/bench_render_target.py [--pages 5] [--dpi 400]
+#
+# Cada modo roda em um subprocesso para que o pico de RSS seja medido isoladamente.
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from pdfcropper.export import render_page, target_pixel_size  # noqa: E402
+
+TARGET_SIZE = (595, 842)  # A4
+CLIP = fitz.Rect(36, 36, 500, 760)
+
+
+def make_document(path, pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=595, height=842)
+        for line in range(60):
+            page.insert_text((40, 40 + line * 12), f"Página {i + 1} linha {line} " * 4,
+                             fontsize=9)
+        for k in range(40):
+            page.draw_circle((300, 420), 10 + k * 5, color=(k / 40, 0, 1 - k / 40))
+    doc.save(path)
+    doc.close()
+
+
+def legacy_render(page, clip, target_size, dpi):
+    # Caminho original de save_pdf/export_selected_pages
+    scale_factor = dpi / 72
+    cropped_page = page.get_pixmap(clip=clip, matrix=fitz.Matrix(scale_factor, scale_factor))
+    img = Image.frombytes(
+        "RGB", (cropped_page.width, cropped_page.height), cropped_page.samples)
+    resized_img = img.resize(target_pixel_size(target_size, dpi), resample=Image.LANCZOS)
+    img_byte_arr = io.BytesIO()
+    resized_img.save(img_byte_arr, format="PNG", quality=100)
+    pixels = cropped_page.width * cropped_page.height
+    return img_byte_arr.getvalue(), pixels
+
+
+def direct_render(page, clip, target_size, dpi):
+    stream = render_page(page, clip, target_size, dpi, fit="stretch", encoding="png")[0]
+    width, height = target_pixel_size(target_size, dpi)
+    return stream, width * height
+
+
+def run_mode(mode, path, dpi):
+    render = legacy_render if mode == "legacy" else direct_render
+    doc = fitz.open(path)
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    rendered_pixels = 0
+    for page in doc:
+        _, pixels = render(page, CLIP, TARGET_SIZE, dpi)
+        rendered_pixels += pixels
+    pages = len(doc)
+    result = {
+        "mode": mode,
+        "cpu_s_per_page": (time.process_time() - cpu) / pages,
+        "wall_s_per_page": (time.perf_counter() - wall) / pages,
+        "rendered_mpx_per_page": rendered_pixels / pages / 1e6,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--dpi", type=int, default=400)
+    parser.add_argument("--mode", choices=("legacy", "direct"))
+    parser.add_argument("--input")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.input, args.dpi)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        make_document(path, args.pages)
+        results = {}
+        for mode in ("legacy", "direct"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--input", path,
+                 "--dpi", str(args.dpi)],
+                check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    for mode, result in results.items():
+        print(f"{mode:>7}: {result['cpu_s_per_page'] * 1000:8.1f} ms CPU/página, "
+              f"{result['rendered_mpx_per_page']:6.1f} Mpx/página, "
+              f"pico RSS {result['peak_rss_mb']:7.1f} MB")
+    legacy, direct = results["legacy"], results["direct"]
+    print(f"economia: {(1 - direct['cpu_s_per_page'] / legacy['cpu_s_per_page']) * 100:.0f}% CPU, "
+          f"{legacy['peak_rss_mb'] - direct['peak_rss_mb']:.1f} MB de pico RSS")
+
+
+if __name__ == "__main__":
+    main()
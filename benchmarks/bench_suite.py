@@ -0,0 +1,221 @@
+# Suíte de benchmarks sobre o corpus sintético (benchmarks/corpus.py).
+#
+# Para cada tipo de documento e número de páginas mede, em um subprocesso
+# novo: abertura, primeira pintura, troca de página, passo de zoom, aplicação
+# de um recorte em todas as páginas, exportação vetorial e raster, e o pico de
+# RSS. As operações de tela chamam as mesmas funções da janela
+# (pdfcropper/view.py: renderização em Matrix(1, 1), redimensionamento
+# LANCZOS e aplicação do recorte), sem o Tk e sem os caches.
+#
+#   python benchmarks/bench_suite.py [--kinds text scan] [--pages 10 100]
+#                                    [--output atual.json] [--baseline base.json]
+#
+# O caso de 10 mil páginas faz parte do padrão: é onde aparecem os custos
+# que crescem com o documento (abrir, aplicar o recorte em todas as páginas).
+# Gerar o corpus dele leva alguns minutos; --corpus-dir o reaproveita entre
+# execuções.
+#
+# Com --baseline, as métricas que pioraram mais que --threshold são marcadas
+# como regressão e o código de saída é 1.
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import KINDS, corpus_path  # noqa: E402
+from pdfcropper.core import (DISPLAY_SCALE, TARGET_SIZES, PageStates,  # noqa: E402
+                             lazy_import)
+from pdfcropper.croptable import CropTable, page_rect_to_cropbox  # noqa: E402
+from pdfcropper.export import export_pages  # noqa: E402
+from pdfcropper.view import (apply_crop, base_image, load_rotated,  # noqa: E402
+                             resize_view, view_sizes)
+
+fitz = lazy_import("fitz")
+Image = lazy_import("PIL.Image")
+
+DEFAULT_PAGES = (10, 100, 1000, 10000)
+# Trocas de página e passos de zoom medidos por execução (mediana)
+FLIPS = 10
+ZOOM_STEPS = 5
+ZOOM_FACTOR = 1.1
+# Páginas exportadas por caso: exportar 10 mil páginas mediria só o disco
+DEFAULT_EXPORT_PAGES = 10
+DEFAULT_THRESHOLD = 0.15
+# Diferenças absolutas menores que isto (ms ou MB) não contam como regressão
+DEFAULT_MIN_DELTA = 1.0
+
+# métrica -> unidade; todas são "menor é melhor"
+METRICS = {
+    "open_ms": "ms",
+    "first_paint_ms": "ms",
+    "page_flip_ms": "ms",
+    "zoom_step_ms": "ms",
+    "crop_apply_ms": "ms",
+    "export_vector_ms": "ms",
+    "export_raster_ms": "ms",
+    "peak_rss_mb": "MB",
+}
+
+
+def _ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+def paint(doc, page_states, page_num, scale_factor=1.0):
+    # Mesmo trabalho de show_page sem cache: imagem base + imagem da tela
+    page = load_rotated(doc, page_num, page_states.rotation(page_num))
+    base, _ = base_image(page)
+    return base, zoom(base, page_num, scale_factor)
+
+
+def zoom(base, page_num, scale_factor):
+    _, size = view_sizes(base.size, DISPLAY_SCALE, scale_factor)
+    return resize_view(base, size, page_num)
+
+
+def run_case(path, export_pages_count, dpi):
+    results = {}
+    # Os imports preguiçosos ficam fora das medições
+    fitz.Matrix, Image.Resampling
+
+    started = time.perf_counter()
+    doc = fitz.open(path)
+    crop_table = CropTable(len(doc))
+    page_states = PageStates()
+    results["open_ms"] = _ms(started)
+
+    started = time.perf_counter()
+    base, _ = paint(doc, page_states, 0)
+    results["first_paint_ms"] = _ms(started)
+
+    samples = []
+    for page_num in range(1, min(len(doc), FLIPS + 1)):
+        started = time.perf_counter()
+        paint(doc, page_states, page_num)
+        samples.append(_ms(started))
+    results["page_flip_ms"] = statistics.median(samples) if samples else 0.0
+
+    samples = []
+    scale_factor = 1.0
+    for _ in range(ZOOM_STEPS):
+        scale_factor *= ZOOM_FACTOR
+        started = time.perf_counter()
+        zoom(base, 0, scale_factor)
+        samples.append(_ms(started))
+    results["zoom_step_ms"] = statistics.median(samples)
+
+    # Recorte de 1 cm nas margens aplicado a todas as páginas (apply_cropbox)
+    started = time.perf_counter()
+    page = doc.load_page(0)
+    rect = page_rect_to_cropbox(page, fitz.Rect(28, 28, page.rect.x1 - 28,
+                                                 page.rect.y1 - 28))
+    apply_crop(doc, crop_table, range(len(doc)), rect, {})
+    results["crop_apply_ms"] = _ms(started)
+    doc.close()
+
+    page_nums = range(min(export_pages_count, len(crop_table)))
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("vector", "raster"):
+            output = os.path.join(tmp, f"{mode}.pdf")
+            started = time.perf_counter()
+            export_pages(path, page_nums, None, TARGET_SIZES["A4"], output, mode=mode,
+                         dpi=dpi, crop_table=crop_table)
+            results[f"export_{mode}_ms"] = _ms(started)
+
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def run_child(path, args):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", path, "--export-pages",
+         str(args.export_pages), "--dpi", str(args.dpi)],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold, min_delta):
+    # [(caso, métrica, base, atual, variação)] das métricas que pioraram
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(case, {}).get(metric)
+            if not old:
+                continue
+            change = value / old - 1
+            if change > threshold and value - old > min_delta:
+                regressions.append((case, metric, old, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGES))
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="execuções por caso (vale a mediana)")
+    parser.add_argument("--export-pages", type=int, default=DEFAULT_EXPORT_PAGES)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--corpus-dir",
+                        help="reaproveita o corpus gerado (padrão: diretório temporário)")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA)
+    parser.add_argument("--child", metavar="PDF", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args.export_pages, args.dpi)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or tmp
+        results = {}
+        for kind in args.kinds:
+            for pages in args.pages:
+                path = corpus_path(corpus_dir, kind, pages)
+                runs = [run_child(path, args) for _ in range(args.repeat)]
+                case = f"{kind}/{pages}"
+                results[case] = {metric: statistics.median(run[metric] for run in runs)
+                                 for metric in METRICS}
+                print(f"{case:>16}: " + ", ".join(
+                    f"{metric} {value:.1f}" for metric, value in results[case].items()),
+                    flush=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pymupdf": fitz.VersionBind,
+        "settings": {"repeat": args.repeat, "export_pages": args.export_pages,
+                     "dpi": args.dpi},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for case, metric, old, value, change in regressions:
+            print(f"REGRESSÃO {case} {metric}: {old:.1f} -> {value:.1f} "
+                  f"{METRICS[metric]} (+{change * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.threshold * 100:.0f}% em relação a "
+              f"{args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Corpus sintético e determinístico para os benchmarks: o mesmo tipo e número
+# de páginas gera sempre o mesmo conteúdo, em qualquer máquina.
+#
+#   text     - páginas de texto vetorial
+#   drawings - desenhos densos (centenas de traços por página)
+#   scan     - uma imagem em cinza cobrindo a página (digitalização)
+#   mixed    - texto, desenhos e uma figura na mesma página
+#
+#   python benchmarks/corpus.py DIRETÓRIO [--kinds text scan] [--pages 10 100]
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdfcropper.core import lazy_import  # noqa: E402
+
+fitz = lazy_import("fitz")
+
+KINDS = ("text", "drawings", "scan", "mixed")
+PAGE_COUNTS = (10, 100, 1000, 10000)
+PAGE_SIZE = (595, 842)  # A4
+# Páginas distintas geradas uma a uma; o resto do documento é cópia delas
+UNIQUE_PAGES = 20
+SEED = 2024
+SCAN_DPI = 150
+
+WORDS = ("recorte página margem documento conteúdo imagem texto vetorial "
+         "exportação resolução tamanho figura tabela capítulo seção").split()
+
+
+def _text_block(page, rng, rect, fontsize=10):
+    lines = int(rect.height // (fontsize * 1.3))
+    text = "\n".join(" ".join(rng.choice(WORDS) for _ in range(9))
+                     for _ in range(lines))
+    page.insert_textbox(rect, text, fontsize=fontsize)
+
+
+def _drawings(page, rng, rect, count):
+    shape = page.new_shape()
+    for _ in range(count):
+        x0, x1 = sorted(rng.uniform(rect.x0, rect.x1) for _ in range(2))
+        y0, y1 = sorted(rng.uniform(rect.y0, rect.y1) for _ in range(2))
+        if rng.random() < 0.5:
+            shape.draw_line((x0, y0), (x1, y1))
+        else:
+            shape.draw_rect(fitz.Rect(x0, y0, x1, y1))
+        shape.finish(color=(rng.random(), rng.random(), rng.random()), width=0.5)
+    shape.commit()
+
+
+def _scan_image(rng, index):
+    # Página de texto rasterizada em cinza, levemente deslocada como numa
+    # digitalização de verdade
+    source = fitz.open()
+    page = source.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+    dx, dy = rng.uniform(-8, 8), rng.uniform(-8, 8)
+    page.insert_text((60 + dx, 60 + dy), f"Digitalização {index + 1}", fontsize=18)
+    _text_block(page, rng, fitz.Rect(60 + dx, 90 + dy, 540 + dx, 780 + dy))
+    zoom = SCAN_DPI / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+    source.close()
+    return pix.tobytes("png")
+
+
+def _fill_page(page, kind, rng, index):
+    margin = fitz.Rect(56, 56, PAGE_SIZE[0] - 56, PAGE_SIZE[1] - 56)
+    if kind == "text":
+        page.insert_text((56, 48), f"Página {index + 1}", fontsize=14)
+        _text_block(page, rng, margin)
+    elif kind == "drawings":
+        _drawings(page, rng, margin, 600)
+    elif kind == "scan":
+        page.insert_image(page.rect, stream=_scan_image(rng, index))
+    elif kind == "mixed":
+        top = fitz.Rect(margin.x0, margin.y0, margin.x1, margin.y0 + 300)
+        _text_block(page, rng, top)
+        _drawings(page, rng, fitz.Rect(margin.x0, top.y1 + 20, margin.x1, top.y1 + 260), 150)
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 48), False)
+        pix.set_rect(pix.irect, (rng.randrange(256), rng.randrange(256), 128))
+        page.insert_image(fitz.Rect(margin.x0, margin.y1 - 180, margin.x0 + 240,
+                                    margin.y1), pixmap=pix)
+    else:
+        raise ValueError(f"Tipo de corpus desconhecido: {kind}")
+
+
+def make_document(path, kind, pages):
+    rng = random.Random(f"{SEED}-{kind}")
+    doc = fitz.open()
+    for index in range(min(pages, UNIQUE_PAGES)):
+        page = doc.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+        _fill_page(page, kind, rng, index)
+    # Dobra o documento até o tamanho pedido: gerar milhares de páginas uma a
+    # uma levaria mais que as próprias medições
+    while len(doc) < pages:
+        copy = fitz.open()
+        copy.insert_pdf(doc, to_page=min(len(doc), pages - len(doc)) - 1)
+        doc.insert_pdf(copy)
+        copy.close()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def corpus_path(directory, kind, pages):
+    # Gera o documento só se ainda não existir em `directory`
+    path = os.path.join(directory, f"{kind}_{pages}.pdf")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        make_document(tmp_path, kind, pages)
+        os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--pages", type=int, nargs="+", default=list(PAGE_COUNTS))
+    args = parser.parse_args()
+
+    for kind in args.kinds:
+        for pages in args.pages:
+            path = corpus_path(args.directory, kind, pages)
+            print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Pacote com a lógica de recorte/exportação usada pelo PDFCropper.
+#
+# Os nomes abaixo ficam disponíveis em `pdfcropper` sem importar fitz, PIL ou
+# tkinter de antemão: o submódulo só é carregado no primeiro acesso.
+import importlib
+
+_EXPORTS = {
+    "TARGET_SIZES": "pdfcropper.core",
+    "DISPLAY_SCALE": "pdfcropper.core",
+    "parse_page_selection": "pdfcropper.core",
+    "display_rect_to_pdf": "pdfcropper.core",
+    "page_display_rect_to_pdf": "pdfcropper.core",
+    "page_pixel_size": "pdfcropper.core",
+    "PageStates": "pdfcropper.core",
+    "export_pages": "pdfcropper.export",
+    "render_page": "pdfcropper.export",
+    "place_page": "pdfcropper.export",
+    "snapshot_document": "pdfcropper.export",
+    "save_cropboxes": "pdfcropper.export",
+    "ExportCancelled": "pdfcropper.export",
+    "ExportStats": "pdfcropper.export",
+    "encode_pixmap": "pdfcropper.encode",
+    "ExportWorker": "pdfcropper.background",
+    "RenderCache": "pdfcropper.cache",
+    "DiskRenderCache": "pdfcropper.diskcache",
+    "AutoCropper": "pdfcropper.autocrop",
+    "CropTable": "pdfcropper.croptable",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'pdfcropper' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
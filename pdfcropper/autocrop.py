@@ -0,0 +1,153 @@
+# Detecção automática da área com conteúdo ("recortar para o conteúdo").
+#
+# Os retângulos devolvidos estão nas coordenadas de set_cropbox (sem rotação,
+# com origem no canto da mediabox), prontos para aplicar na página.
+import statistics
+
+from pdfcropper.core import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
+ImageFilter = lazy_import("PIL.ImageFilter")
+
+AUTOCROP_MODES = ("page", "union", "median")
+# Margem (em pontos) deixada em volta do conteúdo detectado
+DEFAULT_PADDING = 6
+# Preenchimentos que cobrem quase a página inteira são fundo, não conteúdo
+BACKGROUND_COVERAGE = 0.95
+# Imagens que cobrem a página indicam digitalização: usa a análise de pixels
+SCAN_COVERAGE = 0.9
+# Resolução da imagem usada para aparar as margens das digitalizações
+RASTER_DPI = 36
+# Diferença mínima de cinza em relação ao fundo para contar como tinta
+INK_THRESHOLD = 48
+# Linhas/colunas com menos tinta que esta fração são tratadas como ruído
+NOISE_FRACTION = 0.004
+
+
+def _page_box(page):
+    # Retângulo da página nas coordenadas do bboxlog (sem rotação, relativo ao cropbox)
+    return fitz.Rect(0, 0, page.cropbox.width, page.cropbox.height)
+
+
+def vector_bbox(page):
+    # União das áreas desenhadas (texto, traços, imagens). Devolve None para
+    # páginas vazias e para digitalizações, que precisam de raster_bbox.
+    page_box = _page_box(page)
+    area = page_box.get_area()
+    bbox = fitz.Rect()
+    for kind, rect in page.get_bboxlog():
+        if kind == "ignore-text":
+            continue
+        rect = fitz.Rect(rect) & page_box
+        if rect.is_empty:
+            continue
+        if kind == "fill-image" and rect.get_area() >= SCAN_COVERAGE * area:
+            return None
+        if kind == "fill-path" and rect.get_area() >= BACKGROUND_COVERAGE * area:
+            continue
+        bbox |= rect
+    return None if bbox.is_empty else bbox
+
+
+def _ink_box_numpy(np, pix):
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    gray = gray.reshape(pix.height, pix.stride)[:, :pix.width].astype(np.int16)
+    # A cor do papel é estimada pela borda da imagem
+    border = np.concatenate((gray[0], gray[-1], gray[:, 0], gray[:, -1]))
+    ink = np.abs(gray - int(np.median(border))) > INK_THRESHOLD
+    rows = np.flatnonzero(ink.sum(axis=1) > NOISE_FRACTION * pix.width)
+    cols = np.flatnonzero(ink.sum(axis=0) > NOISE_FRACTION * pix.height)
+    if not len(rows) or not len(cols):
+        return None
+    return (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+
+def _ink_box_pil(pix):
+    img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    width, height = img.size
+    border = [img.crop(box).histogram() for box in (
+        (0, 0, width, 1), (0, height - 1, width, height),
+        (0, 0, 1, height), (width - 1, 0, width, height))]
+    histogram = [sum(counts) for counts in zip(*border)]
+    half, seen, background = sum(histogram) / 2, 0, 255
+    for value, count in enumerate(histogram):
+        seen += count
+        if seen >= half:
+            background = value
+            break
+    # O filtro de mediana remove pontos isolados (ruído da digitalização)
+    mask = img.point(lambda v: 255 if abs(v - background) > INK_THRESHOLD else 0)
+    return mask.filter(ImageFilter.MedianFilter(3)).getbbox()
+
+
+def raster_bbox(page):
+    # Apara as margens a partir de uma imagem em cinza de baixa resolução
+    zoom = RASTER_DPI / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+    try:
+        import numpy
+    except ImportError:
+        box = _ink_box_pil(pix)
+    else:
+        box = _ink_box_numpy(numpy, pix)
+    if box is None:
+        return None
+    # Pixels -> coordenadas da página (com rotação) -> sem rotação
+    rect = fitz.Rect(box) * (1 / zoom)
+    return (rect * page.derotation_matrix) & _page_box(page)
+
+
+class AutoCropper:
+    # Calcula e memoriza a área com conteúdo de cada página de `doc`. A chave
+    # inclui o cropbox atual, então uma página recortada é analisada de novo.
+
+    def __init__(self, doc, padding=DEFAULT_PADDING):
+        self.doc = doc
+        self.padding = padding
+        self._boxes = {}
+
+    def page_bbox(self, page_num):
+        page = self.doc.load_page(page_num)
+        cropbox = page.cropbox
+        key = (page_num, tuple(cropbox))
+        if key not in self._boxes:
+            bbox = vector_bbox(page)
+            if bbox is None:
+                bbox = raster_bbox(page)
+            if bbox is not None:
+                bbox = fitz.Rect(bbox.x0 - self.padding, bbox.y0 - self.padding,
+                                 bbox.x1 + self.padding, bbox.y1 + self.padding)
+                bbox = (bbox & _page_box(page)) + (cropbox.x0, cropbox.y0,
+                                                   cropbox.x0, cropbox.y0)
+            self._boxes[key] = bbox
+        return self._boxes[key]
+
+    def bboxes(self, page_nums, mode="page"):
+        # {página: retângulo}; páginas sem conteúdo ficam de fora.
+        #   page   - cada página com a própria área
+        #   union  - a união das áreas das páginas selecionadas em todas elas
+        #   median - a mediana das áreas de todo o documento em todas elas
+        page_nums = list(page_nums)
+        if mode == "page":
+            boxes = {p: self.page_bbox(p) for p in page_nums}
+            return {p: box for p, box in boxes.items() if box is not None}
+        if mode == "union":
+            common = fitz.Rect()
+            for page_num in page_nums:
+                box = self.page_bbox(page_num)
+                if box is not None:
+                    common |= box
+        elif mode == "median":
+            found = [box for box in map(self.page_bbox, range(len(self.doc)))
+                     if box is not None]
+            common = fitz.Rect(*(statistics.median(side) for side in zip(*found))) \
+                if found else fitz.Rect()
+        else:
+            raise ValueError(f"Modo de recorte automático desconhecido: {mode}")
+        boxes = {}
+        for page_num in page_nums:
+            box = common & self.doc.load_page(page_num).mediabox
+            if not box.is_empty:
+                boxes[page_num] = box
+        return boxes
@@ -0,0 +1,103 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from pdfcropper import trace
+from pdfcropper.export import ExportCancelled, export_pages
+
+
+def _export_process(events, cancel_event, tracing, args, export_options):
+    # Corpo do processo de exportação. A renderização, a montagem dos segmentos
+    # e a gravação seguram o GIL por segundos; fora do processo do Tk, a janela
+    # continua respondendo. O último evento leva os eventos de rastreamento.
+    if tracing:
+        trace.enable()
+
+    def progress(done, total):
+        events.put(("progress", done, total))
+
+    try:
+        stats = export_pages(*args, progress=progress, cancel_event=cancel_event,
+                             **export_options)
+    except ExportCancelled:
+        events.put(("cancelled", trace.drain()))
+    except Exception as e:
+        events.put(("error", str(e), trace.drain()))
+    else:
+        events.put(("done", stats, trace.drain()))
+
+
+class ExportWorker(threading.Thread):
+    # Executa export_pages em um processo separado; esta thread só repassa os
+    # eventos dele. Os eventos são enviados pela fila `events` como tuplas:
+    #   ("progress", feitas, total, páginas/s, eta_segundos)
+    #   ("done", output_path, ExportStats) | ("cancelled",) | ("error", mensagem)
+
+    def __init__(self, source_path, page_nums, clip, target_size, output_path,
+                 cleanup=None, **export_options):
+        super().__init__(daemon=True)
+        self.source_path = source_path
+        self.page_nums = list(page_nums)
+        self.clip = clip
+        self.target_size = target_size
+        self.output_path = output_path
+        self.cleanup = cleanup
+        self.export_options = export_options
+        self.events = queue.Queue()
+        self.cancel_event = multiprocessing.Event()
+        self.started_at = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _progress(self, done, total):
+        elapsed = time.perf_counter() - self.started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else None
+        self.events.put(("progress", done, total, rate, eta))
+
+    def _next_event(self, child_events, process):
+        while True:
+            try:
+                return child_events.get(timeout=0.5)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+            # O processo terminou: o último evento pode ter chegado depois do get
+            try:
+                return child_events.get(timeout=1)
+            except queue.Empty:
+                return ("error", "o processo de exportação terminou inesperadamente "
+                                 f"(código {process.exitcode})", [])
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        child_events = multiprocessing.Queue()
+        # Não é daemon: com workers > 1 ele cria o pool de renderização
+        process = multiprocessing.Process(
+            target=_export_process,
+            args=(child_events, self.cancel_event, trace.enabled(),
+                  (self.source_path, self.page_nums, self.clip, self.target_size,
+                   self.output_path), self.export_options))
+        try:
+            process.start()
+            while True:
+                event = self._next_event(child_events, process)
+                if event[0] != "progress":
+                    break
+                self._progress(event[1], event[2])
+            trace.merge(event[-1])
+            if event[0] == "done":
+                self.events.put(("done", self.output_path, event[1]))
+            elif event[0] == "cancelled":
+                self.events.put(("cancelled",))
+            else:
+                self.events.put(("error", event[1]))
+        except Exception as e:
+            self.events.put(("error", str(e)))
+        finally:
+            if process.pid is not None:
+                process.join()
+            if self.cleanup is not None:
+                self.cleanup()
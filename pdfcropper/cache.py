@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET_MB = 256
+
+
+class RenderCache:
+    # Cache LRU limitado por memória. Cada entrada informa seu tamanho em bytes;
+    # quando o total passa do orçamento, as entradas menos usadas são removidas.
+    # É seguro usar a partir de threads de pré-carregamento.
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if nbytes > self.budget:
+                return
+            self.entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.budget:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [k for k in self.entries if predicate(k)]:
+                self.nbytes -= self.entries.pop(key)[1]
+
+    def discard_pages(self, page_nums):
+        # As chaves seguem o formato (tipo, página, rotação, escala, ...)
+        page_nums = set(page_nums)
+        self.discard(lambda key: key[1] in page_nums)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats_text(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return (f"Cache: {self.hits} acertos / {self.misses} falhas ({ratio:.0f}%), "
+                f"{len(self.entries)} itens, {self.nbytes / 1024 / 1024:.1f}"
+                f"/{self.budget / 1024 / 1024:.0f} MB")
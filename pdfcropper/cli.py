@@ -0,0 +1,351 @@
+# Linha de comando sem interface gráfica:
+#
+#   python -m pdfcropper entrada/*.pdf --settings recorte.json --pages 1-10 \
+#       --size A4 --mode vector -o saida/
+#
+# Códigos de saída: 0 sucesso, 1 algum arquivo falhou, 2 argumentos inválidos.
+#
+# `python -m pdfcropper serve` inicia o serviço de fila (pdfcropper.service).
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pdfcropper import trace
+from pdfcropper.content import DEFAULT_MAX_DPI, DEFAULT_MIN_DPI
+from pdfcropper.core import (TARGET_SIZES, lazy_import, page_display_rect_to_pdf,
+                             parse_page_selection)
+from pdfcropper.croptable import CropTable, page_rect_to_cropbox
+from pdfcropper.encode import DEFAULT_ENCODING, DEFAULT_JPEG_QUALITY, ENCODINGS
+from pdfcropper.export import (DEFAULT_DPI, DEFAULT_FIT, DEFAULT_MODE,
+                               DEFAULT_PAGES_IN_FLIGHT, FIT_MODES, OUTPUT_MODES,
+                               export_pages, load_page, save_cropboxes,
+                               saves_in_place, snapshot_document)
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# Modo que só grava os recortes como CropBox, sem gerar páginas novas
+CROPBOX_MODE = "cropbox"
+
+
+def expand_inputs(patterns):
+    # Aceita arquivos, padrões glob e diretórios (todos os .pdf dentro deles)
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.pdf")))
+        else:
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        paths.extend(m for m in matches if m not in paths)
+    return paths
+
+
+def parse_rect(value):
+    try:
+        rect = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        rect = ()
+    if len(rect) != 4:
+        raise argparse.ArgumentTypeError("use o formato x0,y0,x1,y1")
+    return rect
+
+
+def load_settings(path):
+    # Arquivo gerado por "Salvar Configurações" na janela. Devolve
+    # (crop_rect, rotações, tabela de recortes em JSON ou None)
+    with open(path, "r") as f:
+        settings = json.load(f)
+    rotations = {int(page): state["rotation"]
+                 for page, state in settings.get("page_states", {}).items()
+                 if "rotation" in state}
+    return settings.get("crop_rect"), rotations, settings.get("crop_table")
+
+
+def parse_dpi(value):
+    if value == "auto":
+        return value
+    try:
+        dpi = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("use um número ou 'auto'")
+    if dpi <= 0:
+        raise argparse.ArgumentTypeError("o DPI deve ser positivo")
+    return dpi
+
+
+def output_path_for(input_path, output_dir, suffix):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    directory = output_dir or os.path.dirname(os.path.abspath(input_path))
+    return os.path.join(directory, f"{stem}{suffix}.pdf")
+
+
+def same_file(path, other):
+    # Compara pelo arquivo de fato (links, maiúsculas no Windows) quando ambos existem
+    if os.path.exists(path) and os.path.exists(other):
+        return os.path.samefile(path, other)
+    return os.path.abspath(path) == os.path.abspath(other)
+
+
+def save_page_crops(doc, page_nums, clip, crop_table, output_path):
+    # Só as páginas selecionadas recebem o recorte. No próprio arquivo todas as
+    # páginas são mantidas (a gravação só altera CropBox e Rotate); em outro
+    # arquivo, só as selecionadas são gravadas.
+    for page_num in page_nums:
+        page = load_page(doc, page_num, crop_table)
+        if clip is not None:
+            box = page_rect_to_cropbox(page, clip)
+            if not box.is_empty:
+                page.set_cropbox(box)
+    if len(page_nums) != len(doc) and not saves_in_place(doc, output_path):
+        doc.select(page_nums)
+    save_cropboxes(doc, output_path)
+
+
+def process_file(job):
+    # Executado em um processo separado por arquivo; devolve um dicionário de resultado
+    started = time.perf_counter()
+    result = {"input": job["input"], "output": job["output"], "pages": 0}
+    if job["trace"]:
+        trace.enable()
+    source_path, is_temp = job["input"], False
+    try:
+        doc = fitz.open(job["input"])
+        try:
+            page_count = len(doc)
+            if job["pages"]:
+                page_nums = [p for p in parse_page_selection(job["pages"]) if 0 <= p < page_count]
+            else:
+                page_nums = list(range(page_count))
+
+            # A janela grava a rotação de toda página exibida; só as que
+            # diferem do /Rotate do arquivo são alteradas
+            rotated = False
+            for page_num, rotation in job["rotations"].items():
+                if 0 <= page_num < page_count:
+                    page = doc.load_page(page_num)
+                    if page.rotation != rotation:
+                        page.set_rotation(rotation)
+                        rotated = True
+
+            # "Salvar Configurações" sempre grava a tabela, mesmo vazia
+            crop_table = None
+            if job["crop_table"]:
+                crop_table = CropTable.from_json(job["crop_table"], page_count)
+                if not crop_table.pages():
+                    crop_table = None
+            if job["crop"]:
+                clip = job["crop"]
+            elif job["display_crop"]:
+                # Como na janela: o retângulo desenhado vale dentro do recorte
+                # da tabela, na primeira página exportada
+                first = load_page(doc, page_nums[0] if page_nums else 0, crop_table)
+                clip = page_display_rect_to_pdf(first, job["display_crop"])
+            else:
+                clip = None
+            if job["mode"] == CROPBOX_MODE:
+                save_page_crops(doc, page_nums, clip, crop_table, job["output"])
+            elif rotated:
+                source_path, is_temp = snapshot_document(doc)
+        finally:
+            doc.close()
+
+        if job["mode"] != CROPBOX_MODE:
+            stats = export_pages(
+                source_path, page_nums, clip, job["target_size"], job["output"],
+                mode=job["mode"], dpi=job["dpi"], workers=job["workers"], fit=job["fit"],
+                segment_pages=job["segment_pages"], segment_bytes=job["segment_bytes"],
+                max_in_flight=job["max_in_flight"], encoding=job["encoding"],
+                jpeg_quality=job["jpeg_quality"], passthrough=job["passthrough"],
+                dpi_range=job["dpi_range"], crop_table=crop_table, dedup=job["dedup"])
+            result["encodings"] = stats.summary_lines()
+        result["pages"] = len(page_nums)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if is_temp and os.path.exists(source_path):
+            os.remove(source_path)
+    result["seconds"] = time.perf_counter() - started
+    # Os eventos voltam ao processo principal, que grava o arquivo de trace
+    result["trace"] = trace.drain()
+    return result
+
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    parser = parser_class(
+        prog="pdfcropper",
+        description="Recorta e exporta PDFs sem abrir a interface gráfica.")
+    parser.add_argument("inputs", nargs="+",
+                        help="arquivos PDF, padrões glob ou diretórios")
+    crop = parser.add_mutually_exclusive_group()
+    crop.add_argument("--crop", type=parse_rect,
+                      help="recorte em pontos da página: x0,y0,x1,y1")
+    crop.add_argument("--settings",
+                      help="JSON salvo por 'Salvar Configurações' na janela")
+    parser.add_argument("--pages", default="",
+                        help="páginas a exportar, ex.: 1,3-5 (padrão: todas)")
+    parser.add_argument("--size", choices=sorted(TARGET_SIZES), default="A4",
+                        help="tamanho da página de saída")
+    parser.add_argument("--dpi", type=parse_dpi, default=DEFAULT_DPI,
+                        help="resolução do modo raster, ou 'auto' para escolher "
+                             "por página entre --min-dpi e --max-dpi")
+    parser.add_argument("--min-dpi", type=int, default=DEFAULT_MIN_DPI)
+    parser.add_argument("--max-dpi", type=int, default=DEFAULT_MAX_DPI)
+    parser.add_argument("--mode", choices=OUTPUT_MODES + (CROPBOX_MODE,),
+                        default=DEFAULT_MODE,
+                        help="vector/raster geram páginas no tamanho --size; cropbox "
+                             "só grava os recortes no PDF original (com --suffix '' e "
+                             "sem -o, de forma incremental no próprio arquivo)")
+    parser.add_argument("--fit", choices=FIT_MODES, default=DEFAULT_FIT)
+    parser.add_argument("-o", "--output-dir",
+                        help="diretório de saída (padrão: junto ao arquivo de entrada)")
+    parser.add_argument("--suffix", default="_recortado",
+                        help="sufixo do nome do arquivo gerado")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="arquivos processados em paralelo")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos de renderização por arquivo (modo raster)")
+    parser.add_argument("--segment-pages", type=int, default=None,
+                        help="páginas mantidas em memória antes de cada gravação "
+                             "incremental (0 = gravar tudo no final)")
+    parser.add_argument("--segment-mb", type=int, default=None,
+                        help="MB de imagens sem compressão mantidos em memória antes "
+                             "de cada gravação incremental (0 = sem limite)")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_PAGES_IN_FLIGHT,
+                        help="páginas renderizadas aguardando inserção (modo raster)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="mostrar a resolução e a codificação de cada página")
+    parser.add_argument("--encoding", choices=ENCODINGS, default=DEFAULT_ENCODING,
+                        help="codificação das imagens no modo raster "
+                             "(auto escolhe JPEG/Flate/cinza/1 bit por página)")
+    parser.add_argument("--jpeg-quality", type=int, default=DEFAULT_JPEG_QUALITY,
+                        help="qualidade das páginas codificadas em JPEG (1-100)")
+    parser.add_argument("--no-passthrough", dest="passthrough", action="store_false",
+                        help="renderizar também as páginas digitalizadas em vez de "
+                             "reaproveitar a imagem original")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false",
+                        help="não reaproveitar o conteúdo de páginas repetidas")
+    parser.add_argument("--trace", metavar="ARQUIVO",
+                        default=os.environ.get(trace.TRACE_ENV),
+                        help="gravar o tempo de cada etapa por página (Chrome trace, "
+                             "ou JSON lines se terminar em .jsonl) e mostrar p50/p95")
+    return parser
+
+
+def build_jobs(parser, args):
+    # Valida os argumentos (erros vão para parser.error) e monta um job de
+    # process_file por arquivo de entrada
+    if not 0 < args.min_dpi <= args.max_dpi:
+        parser.error("--min-dpi deve ser positivo e não maior que --max-dpi")
+
+    try:
+        parse_page_selection(args.pages)
+    except ValueError:
+        parser.error("páginas inválidas, use o formato '1,3-5'")
+
+    display_crop, rotations, crop_table = None, {}, None
+    if args.settings:
+        try:
+            display_crop, rotations, crop_table = load_settings(args.settings)
+        except (OSError, ValueError) as e:
+            parser.error(f"não foi possível ler {args.settings}: {e}")
+
+    inputs = expand_inputs(args.inputs)
+    missing = [p for p in inputs if not os.path.isfile(p)]
+    if missing:
+        parser.error("arquivo não encontrado: " + ", ".join(missing))
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    outputs = {path: output_path_for(path, args.output_dir, args.suffix) for path in inputs}
+    if args.mode != CROPBOX_MODE:
+        # As páginas novas seriam gravadas sobre o arquivo enquanto ele é lido;
+        # só o modo cropbox grava no próprio arquivo
+        overwritten = [path for path in inputs if same_file(path, outputs[path])]
+        if overwritten:
+            parser.error("a saída seria o próprio arquivo de entrada (use outro "
+                         "--suffix ou -o): " + ", ".join(overwritten))
+
+    return [{
+        "input": path,
+        "output": outputs[path],
+        "crop": args.crop,
+        "display_crop": display_crop,
+        "crop_table": crop_table,
+        "rotations": rotations,
+        "pages": args.pages,
+        "target_size": TARGET_SIZES[args.size],
+        "mode": args.mode,
+        "dpi": DEFAULT_DPI if args.dpi == "auto" else args.dpi,
+        "dpi_range": (args.min_dpi, args.max_dpi) if args.dpi == "auto" else None,
+        "fit": args.fit,
+        "workers": max(1, args.workers),
+        "segment_pages": args.segment_pages,
+        "segment_bytes": None if args.segment_mb is None else args.segment_mb * 1024 * 1024,
+        "max_in_flight": max(1, args.max_in_flight),
+        "encoding": args.encoding,
+        "jpeg_quality": min(100, max(1, args.jpeg_quality)),
+        "passthrough": args.passthrough,
+        "dedup": args.dedup,
+        "trace": bool(args.trace),
+    } for path in inputs]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["serve"]:
+        from pdfcropper.service import main as serve
+        return serve(argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    jobs = build_jobs(parser, args)
+    if args.trace:
+        trace.enable(args.trace)
+
+    started = time.perf_counter()
+    jobs_in_parallel = max(1, min(args.jobs, len(jobs)))
+    if jobs_in_parallel == 1:
+        results = map(process_file, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs_in_parallel)
+        results = executor.map(process_file, jobs)
+
+    failed = 0
+    try:
+        for result in results:
+            trace.merge(result.pop("trace"))
+            if "error" in result:
+                failed += 1
+                print(f"ERRO {result['input']}: {result['error']} "
+                      f"({result['seconds']:.2f} s)", file=sys.stderr)
+            else:
+                print(f"ok   {result['input']} -> {result['output']} "
+                      f"({result['pages']} páginas, {result['seconds']:.2f} s)")
+                if args.mode != CROPBOX_MODE:
+                    for line in result["encodings"]:
+                        print(f"     {line}")
+    finally:
+        if jobs_in_parallel > 1:
+            executor.shutdown()
+
+    print(f"{len(jobs) - failed}/{len(jobs)} arquivos em "
+          f"{time.perf_counter() - started:.2f} s")
+    if args.trace:
+        for line in trace.finish():
+            print(line)
+        print(f"trace gravado em {args.trace}")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# Análise do conteúdo das páginas de origem para escolher como exportá-las
+from pdfcropper.core import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+# Fração mínima da página coberta pela imagem para tratá-la como digitalização
+SCAN_COVERAGE = 0.9
+# Operações que não impedem o repasse da imagem original (o texto invisível
+# das páginas com OCR vem como "ignore-text")
+_SCAN_OPERATIONS = {"fill-image", "ignore-text"}
+
+
+def scan_image(page):
+    # Devolve o xref da única imagem de uma página digitalizada, ou None se a
+    # página tem outro conteúdo visível e precisa ser renderizada.
+    log = page.get_bboxlog()
+    if any(kind not in _SCAN_OPERATIONS for kind, _ in log):
+        return None
+    boxes = [fitz.Rect(bbox) for kind, bbox in log if kind == "fill-image"]
+    images = page.get_images(full=True)
+    if len(boxes) != 1 or len(images) != 1:
+        return None
+    covered = (boxes[0] & page.rect).get_area()
+    if covered < SCAN_COVERAGE * page.rect.get_area():
+        return None
+    return images[0][0]
+
+
+# Limites padrão da resolução adaptativa
+DEFAULT_MIN_DPI = 150
+DEFAULT_MAX_DPI = 600
+# Pixels por em desejados para o menor texto visível da página
+TEXT_PIXELS_PER_EM = 32
+# Resolução para desenhos vetoriais sem texto (linhas finas, gráficos)
+LINE_ART_DPI = 300
+
+
+def output_zoom(clip, target_size, fit):
+    # Ampliação do recorte ao ser colocado na página alvo
+    zoom_x = target_size[0] / clip.width
+    zoom_y = target_size[1] / clip.height
+    return min(zoom_x, zoom_y) if fit == "fit" else max(zoom_x, zoom_y)
+
+
+def choose_dpi(page, clip, target_size, fit, min_dpi=DEFAULT_MIN_DPI,
+               max_dpi=DEFAULT_MAX_DPI):
+    # Devolve (dpi, motivo): a menor resolução da página alvo que preserva as
+    # imagens na resolução efetiva delas, o menor texto com TEXT_PIXELS_PER_EM
+    # e os desenhos vetoriais com LINE_ART_DPI, dentro de [min_dpi, max_dpi].
+    clip = fitz.Rect(clip)
+    zoom = output_zoom(clip, target_size, fit)
+    needs = []
+
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        if bbox.width <= 0 or not bbox.intersects(clip):
+            continue
+        native = info["width"] / (bbox.width / 72)
+        needs.append((native / zoom, f"imagem {native:.0f} dpi"))
+
+    # type 3 é texto invisível (camada de OCR)
+    sizes = [span["size"] for span in page.get_texttrace()
+             if span["type"] != 3 and span["size"] > 0
+             and fitz.Rect(span["bbox"]).intersects(clip)]
+    if sizes:
+        smallest = min(sizes)
+        needs.append((TEXT_PIXELS_PER_EM * 72 / (smallest * zoom),
+                      f"texto {smallest:.1f} pt"))
+
+    if any(kind.endswith("-path") or kind == "fill-shade"
+           for kind, bbox in page.get_bboxlog() if fitz.Rect(bbox).intersects(clip)):
+        needs.append((LINE_ART_DPI, "vetorial"))
+
+    if not needs:
+        return min_dpi, "vazia"
+    dpi, reason = max(needs)
+    return int(min(max_dpi, max(min_dpi, round(dpi)))), reason
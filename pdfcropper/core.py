@@ -0,0 +1,90 @@
+# Lógica de recorte sem dependência de interface gráfica, compartilhada entre
+# a janela Tk, a linha de comando e os processos de exportação. Este módulo não
+# importa fitz/PIL/tkinter: bibliotecas pesadas entram via lazy_import.
+import importlib
+
+TARGET_SIZES = {
+    "A4": (595, 842),
+    "A5": (420, 595),
+    "Letter": (612, 792)
+}
+
+# Escala usada pela janela para exibir a página (pixels de tela por ponto)
+DISPLAY_SCALE = 0.75
+
+
+class _LazyModule:
+    # Substituto do módulo que só o importa no primeiro acesso a um atributo.
+    # Depois disso os atributos são copiados e o acesso fica direto.
+
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__["_lazy_name"])
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    return _LazyModule(name)
+
+
+class PageStates(dict):
+    # Estado de visualização por página. Páginas nunca acessadas não ocupam
+    # memória: o estado padrão é criado no primeiro acesso por []. A rotação
+    # padrão vem de original_rotation(página) (o /Rotate do arquivo), ou 0.
+
+    def __init__(self, original_rotation=None):
+        super().__init__()
+        self.original_rotation = original_rotation
+
+    def default_rotation(self, page_num):
+        return self.original_rotation(page_num) if self.original_rotation else 0
+
+    def __missing__(self, page_num):
+        state = self[page_num] = {"scale_factor": 1.0, "x_offset": 0, "y_offset": 0,
+                                  "rotation": self.default_rotation(page_num)}
+        return state
+
+    def rotation(self, page_num):
+        # Consulta sem criar o estado da página
+        state = self.get(page_num)
+        return state["rotation"] if state else self.default_rotation(page_num)
+
+
+def parse_page_selection(page_input):
+    # "1,3-5" -> [0, 2, 3, 4]. Levanta ValueError se a entrada for inválida.
+    if not page_input:
+        return []
+    pages = set()
+    for part in page_input.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = map(int, part.split("-"))
+            pages.update(range(start - 1, end))
+        else:
+            pages.add(int(part) - 1)
+    return sorted(pages)
+
+
+def display_rect_to_pdf(crop_rect, page_rect_size, pix_size, display_scale=DISPLAY_SCALE):
+    # Converte um recorte em pixels da janela (como em save_settings) para
+    # coordenadas da página em pontos.
+    media_width, media_height = page_rect_size
+    pix_width, pix_height = pix_size
+    scale_x = media_width / (pix_width * display_scale)
+    scale_y = media_height / (pix_height * display_scale)
+    x1, y1, x2, y2 = crop_rect
+    return (x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
+
+
+def page_pixel_size(page):
+    # Tamanho do pixmap de page.get_pixmap(matrix=fitz.Matrix(1, 1)), sem renderizar
+    irect = page.rect.irect
+    return irect.width, irect.height
+
+
+def page_display_rect_to_pdf(page, crop_rect, display_scale=DISPLAY_SCALE):
+    return display_rect_to_pdf(crop_rect, (page.rect.width, page.rect.height),
+                               page_pixel_size(page), display_scale)
@@ -0,0 +1,142 @@
+# Tabela de recortes por página.
+#
+# Cada página guarda o índice (array de inteiros, -1 = sem recorte) de um
+# retângulo numa paleta de retângulos distintos, então a consulta é O(1) e a
+# memória é de 4 bytes por página. Os retângulos estão nas coordenadas de
+# set_cropbox (pontos, sem rotação, origem no canto da mediabox).
+#
+# Na serialização as páginas com o mesmo retângulo viram sequências
+# [início, quantidade, passo, índice]: "todas", "ímpares", "pares" e
+# intervalos ocupam uma sequência cada, qualquer que seja o número de páginas.
+from array import array
+
+from pdfcropper.core import lazy_import, parse_page_selection
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+_NO_RECT = -1
+# Regras aceitas por pages_for_rule além de seleções como "1,3-5"
+RULE_ALL = ("todas", "all")
+RULE_ODD = ("ímpares", "impares", "odd")
+RULE_EVEN = ("pares", "even")
+
+
+def pages_for_rule(rule, page_count):
+    # "todas", "ímpares", "pares" ou "1,3-5" -> páginas (base 0) do documento.
+    # Levanta ValueError se a regra for inválida.
+    rule = rule.strip().lower()
+    if rule in RULE_ALL:
+        return range(page_count)
+    if rule in RULE_ODD:
+        return range(0, page_count, 2)
+    if rule in RULE_EVEN:
+        return range(1, page_count, 2)
+    return [p for p in parse_page_selection(rule) if 0 <= p < page_count]
+
+
+def page_rect_to_cropbox(page, rect):
+    # Retângulo em coordenadas de page.rect (com rotação e relativo ao cropbox
+    # atual) -> coordenadas de set_cropbox
+    rect = fitz.Rect(rect) * page.derotation_matrix
+    origin = page.cropbox
+    rect = fitz.Rect(rect.x0 + origin.x0, rect.y0 + origin.y0,
+                     rect.x1 + origin.x0, rect.y1 + origin.y0)
+    return rect & page.mediabox
+
+
+class CropTable:
+
+    def __init__(self, page_count):
+        self.rects = []
+        self._rect_ids = {}
+        self.index = array("i", [_NO_RECT]) * page_count
+
+    def __len__(self):
+        return len(self.index)
+
+    def _rect_id(self, rect):
+        rect = tuple(round(float(v), 3) for v in rect)
+        rect_id = self._rect_ids.get(rect)
+        if rect_id is None:
+            rect_id = self._rect_ids[rect] = len(self.rects)
+            self.rects.append(rect)
+        return rect_id
+
+    def get(self, page_num, default=None):
+        rect_id = self.index[page_num]
+        return default if rect_id == _NO_RECT else self.rects[rect_id]
+
+    def set(self, page_nums, rect):
+        rect_id = self._rect_id(rect)
+        if isinstance(page_nums, range) and page_nums.step > 0:
+            # Faixas e regras ímpares/pares: atribuição por fatia, sem laço em Python
+            pages = range(page_nums.start, min(page_nums.stop, len(self.index)),
+                          page_nums.step)
+            self.index[pages.start:pages.stop:pages.step] = \
+                array("i", [rect_id]) * len(pages)
+            return
+        for page_num in page_nums:
+            self.index[page_num] = rect_id
+
+    def set_rule(self, rule, rect):
+        self.set(pages_for_rule(rule, len(self)), rect)
+
+    def clear(self, page_nums=None):
+        if page_nums is None:
+            self.rects = []
+            self._rect_ids = {}
+            self.index = array("i", [_NO_RECT]) * len(self.index)
+            return
+        for page_num in page_nums:
+            self.index[page_num] = _NO_RECT
+
+    def pages(self):
+        # Páginas com recorte definido
+        return [p for p, rect_id in enumerate(self.index) if rect_id != _NO_RECT]
+
+    def runs(self):
+        # [(início, quantidade, passo, índice)]: para cada retângulo, as páginas
+        # que o usam agrupadas em progressões aritméticas.
+        positions = {}
+        for page_num, rect_id in enumerate(self.index):
+            if rect_id != _NO_RECT:
+                positions.setdefault(rect_id, []).append(page_num)
+        runs = []
+        for rect_id, pages in positions.items():
+            start, count, step = pages[0], 1, 1
+            for page_num in pages[1:]:
+                if count == 1:
+                    step = page_num - start
+                    count = 2
+                elif page_num - start == count * step:
+                    count += 1
+                else:
+                    runs.append((start, count, step, rect_id))
+                    start, count, step = page_num, 1, 1
+            runs.append((start, count, step, rect_id))
+        return runs
+
+    def to_json(self):
+        # Só os retângulos em uso entram na paleta gravada
+        runs = self.runs()
+        used = sorted({rect_id for *_, rect_id in runs})
+        renumber = {rect_id: new_id for new_id, rect_id in enumerate(used)}
+        return {
+            "page_count": len(self),
+            "rects": [list(self.rects[rect_id]) for rect_id in used],
+            "runs": [[start, count, step, renumber[rect_id]]
+                     for start, count, step, rect_id in runs],
+        }
+
+    @classmethod
+    def from_json(cls, data, page_count=None):
+        # page_count permite aplicar a tabela a um documento de outro tamanho:
+        # as páginas que não existem nele são ignoradas.
+        if page_count is None:
+            page_count = data["page_count"]
+        table = cls(page_count)
+        rect_ids = [table._rect_id(rect) for rect in data.get("rects", [])]
+        for start, count, step, rect_id in data.get("runs", []):
+            table.set(range(start, start + count * step, step),
+                      table.rects[rect_ids[rect_id]])
+        return table
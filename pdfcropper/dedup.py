@@ -0,0 +1,87 @@
+# Detecção de páginas repetidas (separadores em branco, capas e versos de
+# formulário repetidos) para que a exportação renderize e grave cada conteúdo
+# uma única vez.
+#
+# page_digest compara as páginas de origem: streams de conteúdo, cropbox,
+# mediabox, rotação e todos os objetos alcançáveis a partir dos recursos e das
+# anotações da página. Cada objeto entra com o dicionário (sem os números de
+# objeto, que mudam entre cópias da mesma página) e o stream, e os objetos que
+# ele referencia entram em seguida, recursivamente: /Matrix, /BBox, /Decode e
+# /SMask das imagens e formulários contam, assim como os recursos aninhados dos
+# formulários. Páginas com o mesmo resumo produzem a mesma saída, então a
+# renderização pode ser pulada.
+import hashlib
+import re
+
+from pdfcropper.core import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+_REFERENCE = re.compile(r"(\d+) 0 R")
+# Objetos que levariam da página de volta à árvore de páginas (e a todo o
+# documento) não fazem parte da aparência da página
+_SKIPPED_KEYS = re.compile(r"/(Parent|P|StructParent|StructParents)\s+\d+ 0 R")
+
+
+class PageHasher:
+    # Resumos das páginas de `doc`; os objetos compartilhados entre páginas
+    # (a mesma imagem, fonte ou formulário) são resumidos uma única vez.
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._xrefs = {}
+        self._first = {}
+
+    def _text_digest(self, text, visiting):
+        # Texto de um objeto PDF com as referências trocadas pelo resumo do
+        # objeto referenciado
+        digest = hashlib.blake2b(digest_size=16)
+        text = _SKIPPED_KEYS.sub("", text)
+        digest.update(_REFERENCE.sub("R", text).encode())
+        for match in _REFERENCE.finditer(text):
+            digest.update(self._xref_digest(int(match.group(1)), visiting))
+        return digest.digest()
+
+    def _xref_digest(self, xref, visiting):
+        digest = self._xrefs.get(xref)
+        if digest is not None:
+            return digest
+        if xref in visiting or not 0 < xref < self.doc.xref_length():
+            # Referência circular (ou inválida): entra o número do objeto, que
+            # só casa com ele mesmo
+            return b"ciclo %d" % xref
+        visiting.add(xref)
+        try:
+            text = self.doc.xref_object(xref, compressed=True)
+            data = self.doc.xref_stream_raw(xref) if self.doc.xref_is_stream(xref) else b""
+            digest = hashlib.blake2b(self._text_digest(text, visiting) + (data or b""),
+                                     digest_size=16).digest()
+        finally:
+            visiting.discard(xref)
+        self._xrefs[xref] = digest
+        return digest
+
+    def _key_text(self, page, key):
+        # Valor da chave na página ou, para /Resources, herdado da árvore de páginas
+        xref = page.xref
+        while True:
+            kind, value = self.doc.xref_get_key(xref, key)
+            if kind != "null" or key != "Resources":
+                return value
+            kind, parent = self.doc.xref_get_key(xref, "Parent")
+            if kind != "xref":
+                return value
+            xref = int(parent.split()[0])
+
+    def page_digest(self, page):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((tuple(page.cropbox), tuple(page.mediabox),
+                            page.rotation)).encode())
+        digest.update(page.read_contents())
+        for key in ("Resources", "Annots"):
+            digest.update(self._text_digest(self._key_text(page, key), set()))
+        return digest.digest()
+
+    def source_page(self, page_num, page):
+        # Primeira página vista com o mesmo conteúdo (a própria, se for nova)
+        return self._first.setdefault(self.page_digest(page), page_num)
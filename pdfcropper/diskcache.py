@@ -0,0 +1,160 @@
+# Cache de renderizações em disco, compartilhado entre sessões.
+#
+# Cada entrada é um arquivo com um cabeçalho fixo seguido dos pixels crus
+# (sem compressão), lido com mmap. A chave inclui uma impressão digital do
+# conteúdo do arquivo PDF, então reabrir o mesmo documento (mesmo copiado ou
+# renomeado) reaproveita as páginas já renderizadas. O tamanho total é
+# limitado; os arquivos menos usados (pela data de modificação, atualizada a
+# cada leitura) são removidos primeiro.
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+from pdfcropper.core import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+DEFAULT_DISK_BUDGET_MB = 1024
+# Diretório do cache; sem esta variável o cache em disco fica desligado
+DISK_CACHE_ENV = "PDFCROPPER_DISK_CACHE"
+DISK_CACHE_MB_ENV = "PDFCROPPER_DISK_CACHE_MB"
+
+_MAGIC = b"PCR1"
+# magia, largura, altura, componentes por pixel
+_HEADER = struct.Struct("<4sIII")
+_MODES = {1: "L", 3: "RGB"}
+_SUFFIX = ".pix"
+# Tamanho dos blocos lidos para a impressão digital
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+# Após estourar o limite, remove até ficar nesta fração dele
+EVICT_TARGET = 0.9
+
+
+def file_fingerprint(path):
+    # Hash do arquivo inteiro: qualquer byte alterado (um operando num stream
+    # de conteúdo, por exemplo) muda a chave. Amostrar trechos não basta para
+    # isso. O custo é de ~0,5 s a cada 300 MB, só na abertura e só com o
+    # cache em disco ligado.
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(FINGERPRINT_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def disk_key(fingerprint, key, cropbox):
+    # Chave do cache em memória + documento + cropbox da página
+    return (fingerprint,) + tuple(key) + (tuple(round(v, 2) for v in cropbox),)
+
+
+class DiskRenderCache:
+    # Seguro para uso simultâneo pela janela e pelas threads de renderização
+
+    def __init__(self, directory, budget_mb=DEFAULT_DISK_BUDGET_MB):
+        self.directory = directory
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.nbytes = sum(entry.stat().st_size for entry in self._entries())
+        if self.nbytes > self.budget:
+            self._evict()
+
+    @classmethod
+    def from_env(cls):
+        # None quando PDFCROPPER_DISK_CACHE não está definido
+        directory = os.environ.get(DISK_CACHE_ENV)
+        if not directory:
+            return None
+        return cls(directory, float(os.environ.get(DISK_CACHE_MB_ENV,
+                                                   DEFAULT_DISK_BUDGET_MB)))
+
+    def _entries(self):
+        with os.scandir(self.directory) as entries:
+            return [e for e in entries if e.name.endswith(_SUFFIX) and e.is_file()]
+
+    def _path(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + _SUFFIX)
+
+    def get(self, key):
+        # Imagem PIL da entrada, ou None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, width, height, n = _HEADER.unpack_from(data)
+                end = _HEADER.size + width * height * n
+                if magic != _MAGIC or n not in _MODES or len(data) != end:
+                    raise ValueError(path)
+                img = Image.frombytes(_MODES[n], (width, height),
+                                      data[_HEADER.size:end])
+            # A data de modificação marca o último uso (ordem LRU)
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return img
+
+    def put(self, key, pix):
+        # Grava os pixels de um Pixmap sem canal alfa
+        if pix.alpha or pix.stride != pix.width * pix.n:
+            return
+        self.put_samples(key, pix.width, pix.height, pix.n, pix.samples_mv)
+
+    def put_samples(self, key, width, height, n, samples):
+        # Pixels crus (linhas sem preenchimento) vindos de outro processo
+        if n not in _MODES:
+            return
+        nbytes = _HEADER.size + len(samples)
+        if nbytes > self.budget:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, width, height, n))
+                f.write(samples)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            # Disco cheio ou sem permissão: o cache é só uma otimização
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self.nbytes += nbytes - replaced
+            if self.nbytes > self.budget:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        self.nbytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.nbytes <= EVICT_TARGET * self.budget:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.nbytes -= size
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self.nbytes = 0
+
+    def stats_text(self):
+        return (f"Disco: {self.hits} acertos / {self.misses} falhas, "
+                f"{self.nbytes / 1024 / 1024:.1f}/{self.budget / 1024 / 1024:.0f} MB")
@@ -0,0 +1,81 @@
+# Escolha da codificação de cada página rasterizada. A análise é feita numa
+# amostra reduzida do pixmap, lida sem copiar pix.samples.
+import io
+
+from pdfcropper.core import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
+ImageChops = lazy_import("PIL.ImageChops")
+
+# "auto" escolhe por página; "png" e "jpeg" forçam uma codificação
+ENCODINGS = ("auto", "png", "jpeg")
+DEFAULT_ENCODING = "auto"
+DEFAULT_JPEG_QUALITY = 85
+
+# Diferença máxima entre canais para considerar a página sem cor
+GRAY_TOLERANCE = 12
+# Fração mínima de pixels perto do preto/branco para usar 1 bit por pixel
+BILEVEL_SHARE = 0.995
+# Traço/texto: as 16 cores mais frequentes cobrem quase toda a página
+LINE_ART_SHARE = 0.85
+SAMPLE_SIZE = 512
+
+
+def _sample(pix):
+    img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv,
+                           "raw", "RGB", pix.stride, 1)
+    factor = max(1, max(pix.width, pix.height) // SAMPLE_SIZE)
+    return img, img.reduce(factor) if factor > 1 else img
+
+
+def classify(sample):
+    # Devolve "bilevel", "flate-gray", "jpeg-gray", "flate" ou "jpeg"
+    r, g, b = sample.split()
+    spread = max(ImageChops.difference(r, g).getextrema()[1],
+                 ImageChops.difference(g, b).getextrema()[1])
+    gray = spread <= GRAY_TOLERANCE
+
+    pixels = sample.width * sample.height
+    if gray:
+        histogram = sample.convert("L").histogram()
+        extremes = sum(histogram[:48]) + sum(histogram[208:])
+        if extremes >= BILEVEL_SHARE * pixels:
+            return "bilevel"
+        colors = sample.convert("L").getcolors(256)
+    else:
+        colors = sample.getcolors(pixels)
+    top = sum(sorted((count for count, _ in colors), reverse=True)[:16])
+    line_art = top >= LINE_ART_SHARE * pixels
+    if gray:
+        return "flate-gray" if line_art else "jpeg-gray"
+    return "flate" if line_art else "jpeg"
+
+
+def encode_pixmap(pix, encoding=DEFAULT_ENCODING, jpeg_quality=DEFAULT_JPEG_QUALITY):
+    # Devolve (stream, estratégia)
+    if encoding == "png":
+        return pix.tobytes("png"), "flate"
+    if encoding == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=jpeg_quality), "jpeg"
+    if encoding != "auto":
+        raise ValueError(f"Codificação desconhecida: {encoding}")
+    if pix.n != 3 or pix.alpha:
+        return pix.tobytes("png"), "flate"
+
+    img, sample = _sample(pix)
+    strategy = classify(sample)
+    if strategy == "flate":
+        return pix.tobytes("png"), strategy
+    if strategy == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=jpeg_quality), strategy
+    if strategy == "bilevel":
+        bilevel = img.convert("L").point(lambda v: 255 if v >= 128 else 0).convert("1")
+        buffer = io.BytesIO()
+        bilevel.save(buffer, format="PNG")
+        return buffer.getvalue(), strategy
+
+    gray = fitz.Pixmap(fitz.csGRAY, pix)
+    if strategy == "jpeg-gray":
+        return gray.tobytes("jpeg", jpg_quality=jpeg_quality), strategy
+    return gray.tobytes("png"), strategy
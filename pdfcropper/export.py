@@ -0,0 +1,559 @@
+import hashlib
+import logging
+import os
+import time
+from collections import namedtuple
+
+from pdfcropper import trace
+from pdfcropper.content import choose_dpi, scan_image
+from pdfcropper.core import lazy_import
+from pdfcropper.dedup import PageHasher
+from pdfcropper.encode import DEFAULT_ENCODING, DEFAULT_JPEG_QUALITY, encode_pixmap
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+DEFAULT_DPI = 400
+DEFAULT_FIT = "fit"
+FIT_MODES = ("fit", "fill", "stretch")
+# "vector" preserva o conteúdo original; "raster" gera uma imagem por página
+DEFAULT_MODE = "vector"
+OUTPUT_MODES = ("vector", "raster")
+# Memória do modo raster: páginas renderizadas aguardando inserção e páginas
+# (e bytes de imagem sem compressão) mantidos em memória antes de cada
+# gravação em disco.
+DEFAULT_PAGES_IN_FLIGHT = 16
+DEFAULT_SEGMENT_PAGES = 50
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+log = logging.getLogger("pdfcropper")
+
+# Resultado de render_page; dpi_reason explica a resolução escolhida
+RenderedPage = namedtuple(
+    "RenderedPage", "stream rect strategy encode_seconds dpi dpi_reason pixels")
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportStats:
+    # Páginas, bytes e tempo de codificação por estratégia (jpeg, flate, ...)
+
+    def __init__(self):
+        self.pages = 0
+        self.strategies = {}
+        # Resolução das páginas renderizadas: pixels gerados e DPI mín./máx.
+        self.rendered = 0
+        self.pixels = 0
+        self.dpi_total = 0
+        self.dpi_min = None
+        self.dpi_max = None
+        # Páginas repetidas que reaproveitaram o conteúdo de outra página
+        self.duplicates = 0
+        self.renders_skipped = 0
+
+    def record(self, strategy, nbytes, seconds):
+        self.pages += 1
+        entry = self.strategies.setdefault(strategy, [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += nbytes
+        entry[2] += seconds
+
+    def record_duplicate(self, render_skipped):
+        self.pages += 1
+        self.duplicates += 1
+        self.renders_skipped += render_skipped
+
+    def record_render(self, dpi, pixels):
+        self.rendered += 1
+        self.pixels += pixels
+        self.dpi_total += dpi
+        self.dpi_min = dpi if self.dpi_min is None else min(self.dpi_min, dpi)
+        self.dpi_max = dpi if self.dpi_max is None else max(self.dpi_max, dpi)
+
+    def summary_lines(self):
+        lines = []
+        if self.rendered:
+            lines.append(f"resolução: {self.dpi_total / self.rendered:.0f} dpi em média "
+                         f"({self.dpi_min}-{self.dpi_max}), {self.pixels / 1e6:.1f} Mpx")
+        for strategy, (pages, nbytes, seconds) in sorted(self.strategies.items()):
+            if not nbytes:
+                lines.append(f"{strategy}: {pages} pág.")
+                continue
+            rate = pages / seconds if seconds > 0 else 0.0
+            lines.append(f"{strategy}: {pages} pág., {nbytes / 1024:.0f} KB "
+                         f"({nbytes / pages / 1024:.0f} KB/pág.), "
+                         f"codificação {rate:.1f} pág/s")
+        if self.duplicates:
+            line = (f"duplicadas: {self.duplicates} de {self.pages} pág. "
+                    f"({self.duplicates / self.pages:.0%}) reaproveitam outra página")
+            if self.renders_skipped:
+                line += f", {self.renders_skipped} sem renderizar"
+            lines.append(line)
+        return lines
+
+
+# Documento aberto por cada processo do pool (fitz não é compartilhável entre
+# processos) e a tabela de recortes usada com ele
+_worker_doc = None
+_worker_crops = None
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def target_pixel_size(target_size, dpi):
+    # 72 é o DPI base do PyMuPDF
+    return (int(target_size[0] / 72 * dpi), int(target_size[1] / 72 * dpi))
+
+
+def snapshot_document(doc):
+    # Os processos abrem o arquivo por conta própria; se o documento tem
+    # alterações em memória (cropbox, rotação) gravamos uma cópia temporária.
+    if doc.name and not doc.is_dirty and os.path.exists(doc.name):
+        return doc.name, False
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="pdfcropper_")
+    os.close(fd)
+    doc.save(path)
+    return path, True
+
+
+def saves_in_place(doc, output_path=None):
+    # output_path None ou o próprio arquivo aberto
+    return output_path is None or bool(doc.name) and (
+        os.path.abspath(output_path) == os.path.abspath(doc.name))
+
+
+def save_cropboxes(doc, output_path=None):
+    # Grava o documento mantendo o conteúdo original: só os dicionários das
+    # páginas alteradas (CropBox, Rotate) mudam, então o resultado continua
+    # vetorial e pesquisável. No próprio arquivo aberto (output_path None ou
+    # igual a doc.name) as alterações são anexadas com uma gravação
+    # incremental; em outro arquivo, uma gravação completa copia os streams
+    # sem recomprimir nem renumerar objetos.
+    if saves_in_place(doc, output_path):
+        if not doc.can_save_incrementally():
+            raise ValueError("Este PDF não permite gravação incremental; "
+                             "salve com outro nome.")
+        doc.saveIncr()
+        return doc.name
+    doc.save(output_path, garbage=0, deflate=False)
+    return output_path
+
+
+def fit_clip(clip, target_pixels, fit):
+    # Devolve (clip, escala_x, escala_y, (largura, altura) em pixels) para que
+    # o MuPDF gere a imagem já no tamanho final, sem redimensionar depois.
+    target_width, target_height = target_pixels
+    if fit == "stretch":
+        return (clip, target_width / clip.width, target_height / clip.height,
+                target_pixels)
+
+    if fit == "fill":
+        # Remove o excesso do recorte (centralizado) para ter a proporção do alvo
+        target_ratio = target_width / target_height
+        if clip.width / clip.height > target_ratio:
+            width = clip.height * target_ratio
+            x0 = clip.x0 + (clip.width - width) / 2
+            clip = fitz.Rect(x0, clip.y0, x0 + width, clip.y1)
+        else:
+            height = clip.width / target_ratio
+            y0 = clip.y0 + (clip.height - height) / 2
+            clip = fitz.Rect(clip.x0, y0, clip.x1, y0 + height)
+        scale = target_width / clip.width
+        return clip, scale, scale, target_pixels
+
+    if fit != "fit":
+        raise ValueError(f"Modo de ajuste desconhecido: {fit}")
+    scale = min(target_width / clip.width, target_height / clip.height)
+    pixels = (max(1, round(clip.width * scale)), max(1, round(clip.height * scale)))
+    return clip, pixels[0] / clip.width, pixels[1] / clip.height, pixels
+
+
+def placement_rect(pixels, target_size, dpi):
+    # Área (em pontos) ocupada pela imagem, centralizada na página alvo
+    width = pixels[0] * 72 / dpi
+    height = pixels[1] * 72 / dpi
+    x0 = (target_size[0] - width) / 2
+    y0 = (target_size[1] - height) / 2
+    return fitz.Rect(x0, y0, x0 + width, y0 + height)
+
+
+def render_page(page, clip, target_size, dpi=DEFAULT_DPI, fit=DEFAULT_FIT,
+                encoding=DEFAULT_ENCODING, jpeg_quality=DEFAULT_JPEG_QUALITY,
+                dpi_range=None):
+    # Devolve um RenderedPage. Com dpi_range=(mínimo, máximo) a resolução é
+    # escolhida pelo conteúdo da página (choose_dpi) em vez de usar `dpi`.
+    clip = fitz.Rect(clip) & page.rect
+    if clip.is_empty:
+        clip = page.rect
+    reason = "fixo"
+    if dpi_range is not None:
+        with trace.span("choose_dpi", page=page.number + 1):
+            dpi, reason = choose_dpi(page, clip, target_size, fit, *dpi_range)
+
+    target_pixels = target_pixel_size(target_size, dpi)
+    clip, scale_x, scale_y, pixels = fit_clip(clip, target_pixels, fit)
+    if fit == "fit":
+        rect = placement_rect(pixels, target_size, dpi)
+    else:
+        rect = fitz.Rect(0, 0, target_size[0], target_size[1])
+
+    # A translação leva o canto do recorte à origem, então o pixmap sai com
+    # exatamente `pixels` de largura e altura.
+    matrix = fitz.Matrix(scale_x, 0, 0, scale_y,
+                         -clip.x0 * scale_x, -clip.y0 * scale_y)
+    with trace.span("get_pixmap", page=page.number + 1, dpi=dpi) as span:
+        pix = page.get_pixmap(clip=clip, matrix=matrix)
+        span.add(bytes=len(pix.samples_mv))
+    started = time.perf_counter()
+    with trace.span("encode", page=page.number + 1) as span:
+        stream, strategy = encode_pixmap(pix, encoding, jpeg_quality)
+        span.add(bytes=len(stream), strategy=strategy)
+    return RenderedPage(stream, tuple(rect), strategy, time.perf_counter() - started,
+                        dpi, reason, pix.width * pix.height)
+
+
+def load_page(doc, page_num, crop_table=None):
+    # Carrega a página aplicando o recorte dela na CropTable, se houver
+    page = doc.load_page(page_num)
+    if crop_table is not None:
+        rect = crop_table.get(page_num)
+        if rect is not None:
+            page.set_cropbox(fitz.Rect(rect) & page.mediabox)
+    return page
+
+
+def _init_worker(source_path, crop_table=None, tracing=False):
+    global _worker_doc, _worker_crops
+    _worker_doc = fitz.open(source_path)
+    _worker_crops = crop_table
+    if tracing:
+        trace.enable()
+
+
+def _render_chunk(task):
+    # Devolve (páginas renderizadas, eventos de rastreamento do bloco)
+    page_nums, clip, target_size, dpi, fit, encoding, jpeg_quality, dpi_range = task
+    clip = fitz.Rect(clip)
+    pages = [render_page(load_page(_worker_doc, page_num, _worker_crops), clip,
+                         target_size, dpi, fit, encoding, jpeg_quality, dpi_range)
+             for page_num in page_nums]
+    return pages, trace.drain()
+
+
+def _chunks(page_nums, workers, max_in_flight):
+    # Blocos contíguos pequenos o suficiente para equilibrar a carga entre
+    # processos e para caber na janela de páginas em andamento.
+    size = max(1, min(len(page_nums) // (workers * 4), max_in_flight // workers))
+    return [page_nums[i:i + size] for i in range(0, len(page_nums), size)]
+
+
+def render_pages(source_path, page_nums, clip, target_size, dpi=DEFAULT_DPI,
+                 workers=1, fit=DEFAULT_FIT, max_in_flight=DEFAULT_PAGES_IN_FLIGHT,
+                 encoding=DEFAULT_ENCODING, jpeg_quality=DEFAULT_JPEG_QUALITY,
+                 dpi_range=None, crop_table=None):
+    # Gera (page_num, RenderedPage) na ordem de page_nums. No máximo
+    # max_in_flight páginas ficam renderizadas e ainda não consumidas. Com
+    # crop_table, cada página usa o próprio recorte e `clip` vale dentro dele.
+    page_nums = list(page_nums)
+    clip = fitz.Rect(clip)
+    workers = max(1, min(workers, len(page_nums)))
+
+    if workers == 1:
+        src = fitz.open(source_path)
+        try:
+            for page_num in page_nums:
+                yield page_num, render_page(
+                    load_page(src, page_num, crop_table), clip, target_size, dpi, fit,
+                    encoding, jpeg_quality, dpi_range)
+        finally:
+            src.close()
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = deque(_chunks(page_nums, workers, max(1, max_in_flight)))
+    clip = tuple(clip)  # fitz.Rect não é serializável para outro processo
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(source_path, crop_table, trace.enabled()))
+    pending = deque()
+    in_flight = 0
+    try:
+        while chunks or pending:
+            while chunks and (not pending or in_flight + len(chunks[0]) <= max_in_flight):
+                chunk = chunks.popleft()
+                pending.append((chunk, executor.submit(
+                    _render_chunk,
+                    (chunk, clip, target_size, dpi, fit, encoding, jpeg_quality,
+                     dpi_range))))
+                in_flight += len(chunk)
+            chunk, future = pending.popleft()
+            results, events = future.result()
+            trace.merge(events)
+            in_flight -= len(chunk)
+            yield from zip(chunk, results)
+            del results
+    finally:
+        # Se o consumidor parar (cancelamento), os blocos pendentes são descartados
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class SegmentedWriter:
+    # Grava o PDF de saída em segmentos: as páginas novas ficam em memória até
+    # somarem `segment_bytes` de imagens (ou `segment_pages` páginas) e então
+    # são anexadas ao arquivo, a primeira vez com save e depois com gravações
+    # incrementais. Entre um segmento e outro o documento é fechado e reaberto
+    # do disco, o que libera as imagens já gravadas: a memória depende do
+    # tamanho do segmento, não do total de páginas. Os dois limites em 0 gravam
+    # tudo de uma vez no final.
+    #
+    # Imagens idênticas (o mesmo stream codificado) são gravadas uma única vez
+    # no arquivo inteiro: `images` guarda o xref de cada uma, e os números de
+    # objeto continuam válidos depois das gravações incrementais.
+
+    def __init__(self, output_path, target_size, segment_pages=0, segment_bytes=0):
+        self.output_path = output_path
+        self.target_size = target_size
+        self.segment_pages = segment_pages
+        self.segment_bytes = segment_bytes
+        self.doc = fitz.open()
+        self.images = {}
+        self.pages_in_segment = 0
+        self.bytes_in_segment = 0
+        self.started = False
+
+    def new_page(self):
+        if (self.segment_pages and self.pages_in_segment >= self.segment_pages
+                or self.segment_bytes and self.bytes_in_segment >= self.segment_bytes):
+            self.flush()
+        if self.doc is None:
+            self.doc = fitz.open(self.output_path)
+        self.pages_in_segment += 1
+        return self.doc.new_page(width=self.target_size[0], height=self.target_size[1])
+
+    def flush(self):
+        if not self.pages_in_segment:
+            return
+        with trace.span("save", pages=self.pages_in_segment,
+                        image_bytes=self.bytes_in_segment) as span:
+            if not self.started:
+                self.started = True
+                self.doc.save(self.output_path, deflate=True)
+            else:
+                # As imagens inseridas ficam sem compressão em memória;
+                # saveIncr() as gravaria assim
+                self.doc.save(self.output_path, incremental=True, deflate=True,
+                              encryption=fitz.PDF_ENCRYPT_KEEP)
+            span.add(bytes=os.path.getsize(self.output_path))
+        self.doc.close()
+        self.doc = None
+        self.pages_in_segment = 0
+        self.bytes_in_segment = 0
+
+    def insert_image(self, rect, stream):
+        # Nova página com a imagem; uma imagem já gravada é só referenciada
+        page = self.new_page()
+        digest = hashlib.blake2b(stream, digest_size=16).digest()
+        xref = self.images.get(digest)
+        if xref is not None:
+            page.insert_image(rect, xref=xref, keep_proportion=False)
+            return
+        xref = page.insert_image(rect, stream=stream, keep_proportion=False)
+        self.images[digest] = xref
+        # /Length do stream ainda não comprimido: o PNG fica decodificado em
+        # memória até a gravação, o JPEG fica como veio
+        self.bytes_in_segment += int(self.doc.xref_get_key(xref, "Length")[1])
+
+    def close(self):
+        if self.doc is not None:
+            self.doc.close()
+
+
+def place_page(new_page, src, page_num, clip, fit=DEFAULT_FIT):
+    # Modo vetorial: desenha o recorte da página de origem na página alvo, sem pixmap
+    page = src.load_page(page_num)
+    clip = fitz.Rect(clip) & page.rect
+    if clip.is_empty:
+        clip = page.rect
+    if fit == "fill":
+        clip = fit_clip(clip, (new_page.rect.width, new_page.rect.height), "fill")[0]
+    elif fit not in FIT_MODES:
+        raise ValueError(f"Modo de ajuste desconhecido: {fit}")
+
+    # show_pdf_page ignora /Rotate ao aplicar o recorte: passamos o recorte em
+    # coordenadas sem rotação e aplicamos a rotação na colocação.
+    rotation = page.rotation
+    source_clip = clip * page.derotation_matrix
+    if rotation:
+        page.set_rotation(0)
+    try:
+        new_page.show_pdf_page(new_page.rect, src, page_num, clip=source_clip,
+                               rotate=-rotation, keep_proportion=fit != "stretch")
+    finally:
+        if rotation:
+            page.set_rotation(rotation)
+
+
+def _raster_steps(writer, stats, source_path, page_nums, clip, dpi, workers, fit,
+                  max_in_flight, encoding, jpeg_quality, passthrough, dpi_range,
+                  crop_table, dedup):
+    # Páginas digitalizadas (uma única imagem) reaproveitam o stream comprimido
+    # original com place_page; só o restante passa pela renderização. Com
+    # dedup, páginas repetidas usam a imagem da primeira ocorrência sem
+    # renderizar de novo.
+    src = fitz.open(source_path)
+    hasher = PageHasher(src) if dedup else None
+    originals = {}
+    duplicates = {}
+    for page_num in page_nums if passthrough or dedup else ():
+        page = load_page(src, page_num, crop_table)
+        if dedup:
+            with trace.span("page_digest", page=page_num + 1):
+                source = hasher.source_page(page_num, page)
+            if source != page_num:
+                duplicates[page_num] = source
+                continue
+        if passthrough:
+            with trace.span("scan_image", page=page_num + 1):
+                xref = scan_image(page)
+            if xref:
+                originals[page_num] = xref
+    # Páginas renderizadas guardadas até a última repetição delas
+    uses = {}
+    for source in duplicates.values():
+        uses[source] = uses.get(source, 0) + 1
+    kept = {}
+
+    pages = render_pages(source_path, [p for p in page_nums
+                                       if p not in originals and p not in duplicates],
+                         clip, writer.target_size, dpi, workers, fit, max_in_flight,
+                         encoding, jpeg_quality, dpi_range, crop_table)
+    try:
+        for page_num in page_nums:
+            source = duplicates.get(page_num, page_num)
+            xref = originals.get(source)
+            if xref is not None:
+                started = time.perf_counter()
+                with trace.span("place_page", page=page_num + 1):
+                    place_page(writer.new_page(), src, source, clip, fit)
+                if source != page_num:
+                    stats.record_duplicate(True)
+                else:
+                    stats.record("original", len(src.xref_stream_raw(xref)),
+                                 time.perf_counter() - started)
+                log.info("página %d: imagem original", page_num + 1)
+            elif source != page_num:
+                rendered = kept[source]
+                uses[source] -= 1
+                if not uses[source]:
+                    del kept[source]
+                with trace.span("insert_image", page=page_num + 1):
+                    writer.insert_image(rendered.rect, rendered.stream)
+                stats.record_duplicate(True)
+                log.info("página %d: igual à página %d", page_num + 1, source + 1)
+                del rendered
+            else:
+                _, rendered = next(pages)
+                with trace.span("insert_image", page=page_num + 1,
+                                bytes=len(rendered.stream)):
+                    writer.insert_image(rendered.rect, rendered.stream)
+                stats.record(rendered.strategy, len(rendered.stream),
+                             rendered.encode_seconds)
+                stats.record_render(rendered.dpi, rendered.pixels)
+                log.info("página %d: %d dpi (%s), %s", page_num + 1, rendered.dpi,
+                         rendered.dpi_reason, rendered.strategy)
+                if page_num in uses:
+                    kept[page_num] = rendered
+                del rendered
+            yield
+    finally:
+        pages.close()
+        src.close()
+
+
+def _vector_steps(writer, stats, source_path, page_nums, clip, fit, crop_table, dedup):
+    # Páginas repetidas apontam para a primeira ocorrência: show_pdf_page
+    # reaproveita o XObject já criado para ela no documento de saída
+    src = fitz.open(source_path)
+    hasher = PageHasher(src) if dedup else None
+    try:
+        for page_num in page_nums:
+            page = load_page(src, page_num, crop_table)
+            source = page_num
+            if dedup:
+                with trace.span("page_digest", page=page_num + 1):
+                    source = hasher.source_page(page_num, page)
+            with trace.span("place_page", page=page_num + 1):
+                place_page(writer.new_page(), src, source, clip, fit)
+            if source != page_num:
+                stats.record_duplicate(False)
+            else:
+                stats.record("vetorial", 0, 0.0)
+            yield
+    finally:
+        src.close()
+
+
+def export_pages(source_path, page_nums, clip, target_size, output_path,
+                 mode=DEFAULT_MODE, dpi=DEFAULT_DPI, workers=1, fit=DEFAULT_FIT,
+                 segment_pages=None, segment_bytes=None,
+                 max_in_flight=DEFAULT_PAGES_IN_FLIGHT, encoding=DEFAULT_ENCODING,
+                 jpeg_quality=DEFAULT_JPEG_QUALITY, passthrough=True, dpi_range=None,
+                 crop_table=None, dedup=True, progress=None, cancel_event=None):
+    # progress(feitas, total) é chamado a cada página; cancel_event é verificado
+    # entre páginas e interrompe a exportação com ExportCancelled. Devolve um
+    # ExportStats com a codificação escolhida para cada página. Com passthrough,
+    # o modo raster mantém a imagem original das páginas digitalizadas.
+    # dpi_range=(mínimo, máximo) escolhe a resolução de cada página pelo
+    # conteúdo; a escolha é registrada no logger "pdfcropper". crop_table
+    # (CropTable) define o recorte de cada página; `clip` é aplicado dentro dele
+    # e clip=None usa a página inteira. Com dedup, páginas repetidas reaproveitam
+    # a imagem (ou o XObject, no modo vetorial) da primeira ocorrência.
+    # segment_pages=None e segment_bytes=None usam DEFAULT_SEGMENT_PAGES e
+    # DEFAULT_SEGMENT_BYTES no modo raster e um único segmento no modo vetorial
+    # (segmentos repetiriam as fontes da origem).
+    page_nums = list(page_nums)
+    total = len(page_nums)
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Modo de saída desconhecido: {mode}")
+    if not page_nums:
+        raise ValueError("Nenhuma página para exportar.")
+    if segment_pages is None:
+        segment_pages = DEFAULT_SEGMENT_PAGES if mode == "raster" else 0
+    if segment_bytes is None:
+        segment_bytes = DEFAULT_SEGMENT_BYTES if mode == "raster" else 0
+    if clip is None:
+        clip = tuple(fitz.INFINITE_RECT())
+
+    writer = SegmentedWriter(output_path, target_size, segment_pages, segment_bytes)
+    stats = ExportStats()
+    if mode == "vector":
+        steps = _vector_steps(writer, stats, source_path, page_nums, clip, fit,
+                              crop_table, dedup)
+    else:
+        steps = _raster_steps(writer, stats, source_path, page_nums, clip, dpi, workers,
+                              fit, max_in_flight, encoding, jpeg_quality, passthrough,
+                              dpi_range, crop_table, dedup)
+
+    try:
+        for done, _ in enumerate(steps, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+            if progress is not None:
+                progress(done, total)
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled()
+        writer.flush()
+    except BaseException:
+        # Só apagamos o arquivo se nós começamos a gravá-lo
+        if writer.started and os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        steps.close()
+        writer.close()
+    return stats
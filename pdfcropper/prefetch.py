@@ -0,0 +1,183 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdfcropper import trace
+from pdfcropper.core import lazy_import
+from pdfcropper.diskcache import disk_key
+from pdfcropper.view import render_base
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
+
+# Quantas páginas à frente (no sentido da navegação) são pré-renderizadas
+PREFETCH_DEPTH = 3
+
+# Documento aberto pelo processo de renderização de cada PagePrefetcher
+_render_doc = None
+
+
+def prefetch_order(current, direction, page_count, depth=PREFETCH_DEPTH):
+    # Páginas vizinhas em ordem de prioridade: primeiro no sentido da navegação,
+    # depois (com menos profundidade) no sentido oposto.
+    direction = -1 if direction < 0 else 1
+    ahead = [current + direction * i for i in range(1, depth + 1)]
+    behind = [current - direction * i for i in range(1, max(1, depth // 2) + 1)]
+    return [p for p in ahead + behind if 0 <= p < page_count]
+
+
+def _init_render_process(source_path, tracing):
+    global _render_doc
+    _render_doc = fitz.open(source_path)
+    if tracing:
+        trace.enable()
+
+
+def _render_in_process(render, trace_name, page_num, rotation, cropbox):
+    # Executado no processo de renderização. Devolve (largura, altura,
+    # componentes, pixels, eventos de rastreamento)
+    page = _render_doc.load_page(page_num)
+    page.set_cropbox(fitz.Rect(cropbox))
+    if page.rotation != rotation:
+        page.set_rotation(rotation)
+    with trace.span(trace_name, page=page_num + 1):
+        pix = render(page)
+    return pix.width, pix.height, pix.n, pix.samples, trace.drain()
+
+
+class PagePrefetcher(threading.Thread):
+    # Renderiza páginas vizinhas no cache de renderização. O MuPDF segura o
+    # GIL durante todo o get_pixmap: renderizando numa thread, a do Tk ficaria
+    # parada até o fim de cada página. Por isso a renderização acontece num
+    # processo próprio (com o seu documento fitz) e esta thread só espera o
+    # resultado, sem o GIL. Cada tarefa traz a rotação e o cropbox atuais da
+    # página, que são reaplicados nesse documento. Com `disk_cache` (e a
+    # impressão digital do arquivo), as páginas já renderizadas numa sessão
+    # anterior são lidas do disco.
+
+    # Nome da etapa no rastreamento (pdfcropper.trace)
+    trace_name = "prefetch"
+    # Função (de módulo, para ir ao outro processo) que renderiza a página
+    render_page = staticmethod(render_base)
+
+    def __init__(self, source_path, cache, disk_cache=None, fingerprint=None):
+        super().__init__(daemon=True)
+        self.source_path = source_path
+        self.cache = cache
+        self.disk_cache = disk_cache if fingerprint else None
+        self.fingerprint = fingerprint
+        self.condition = threading.Condition()
+        self.pending = []
+        self.generation = 0
+        self.stopped = False
+        self.rendered = 0
+        # (tarefa, geração) da renderização em andamento
+        self.active = None
+        # Tarefas cuja renderização falhou: não são tentadas de novo
+        self.failed = set()
+
+    def request(self, tasks):
+        # tasks: [(página, rotação, cropbox)] em ordem de prioridade; substitui
+        # o que ainda não foi processado. Uma tarefa já em andamento (e ainda
+        # válida) não é repetida.
+        with self.condition:
+            self.pending = [task for task in tasks if task not in self.failed]
+            if self.active and self.active[1] == self.generation:
+                self.pending = [task for task in self.pending if task != self.active[0]]
+            self.condition.notify_all()
+
+    def cancel(self):
+        # Descarta pendências e o resultado de uma renderização em andamento
+        # (usado em saltos de página e quando o cropbox muda).
+        with self.condition:
+            self.pending = []
+            self.generation += 1
+
+    def cache_key(self, page_num, rotation, cropbox):
+        return ("base", page_num, rotation, 1.0)
+
+    def on_rendered(self, page_num):
+        # Chamado (nesta thread) quando uma página entra no cache
+        pass
+
+    def wait_rendered(self, task, timeout):
+        # Espera até `timeout` segundos a página da tarefa entrar no cache
+        # (ou a renderização dela falhar); devolve se entrou
+        key = self.cache_key(*task)
+        with self.condition:
+            self.condition.wait_for(
+                lambda: key in self.cache or task in self.failed, timeout)
+            return key in self.cache
+
+    def has_failed(self, task):
+        with self.condition:
+            return task in self.failed
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.pending = []
+            self.generation += 1
+            self.condition.notify_all()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=1, initializer=_init_render_process,
+                                   initargs=(self.source_path, trace.enabled()))
+
+    def run(self):
+        executor = self._new_executor()
+        try:
+            while True:
+                with self.condition:
+                    self.active = None
+                    while not self.pending and not self.stopped:
+                        self.condition.wait()
+                    if self.stopped:
+                        return
+                    task = self.pending.pop(0)
+                    generation = self.generation
+                    self.active = (task, generation)
+                page_num, rotation, cropbox = task
+
+                key = self.cache_key(page_num, rotation, cropbox)
+                if key in self.cache:
+                    self.on_rendered(page_num)
+                    continue
+
+                img = None
+                if self.disk_cache:
+                    stored_key = disk_key(self.fingerprint, key, cropbox)
+                    img = self.disk_cache.get(stored_key)
+                if img is None:
+                    future = executor.submit(_render_in_process, self.render_page,
+                                             self.trace_name, page_num, rotation, cropbox)
+                    try:
+                        width, height, n, samples, events = future.result()
+                    except Exception as e:
+                        # Quem espera pela página (poll_refine, na janela) deixa
+                        # de esperar e a renderiza na própria thread
+                        with self.condition:
+                            self.failed.add(task)
+                            self.condition.notify_all()
+                        if isinstance(e, BrokenProcessPool):
+                            # O processo caiu nesta página: as próximas usam outro
+                            executor.shutdown(wait=False)
+                            executor = self._new_executor()
+                        continue
+                    trace.merge(events)
+                    img = Image.frombytes("RGB", (width, height), samples)
+                    if self.disk_cache:
+                        self.disk_cache.put_samples(stored_key, width, height, n, samples)
+                nbytes = img.width * img.height * len(img.getbands())
+
+                with self.condition:
+                    self.active = None
+                    if generation != self.generation:
+                        continue
+                    self.cache.put(key, img, nbytes)
+                    self.rendered += 1
+                    self.condition.notify_all()
+                self.on_rendered(page_num)
+        finally:
+            # Uma renderização em andamento termina no outro processo, que sai em seguida
+            executor.shutdown(wait=False, cancel_futures=True)
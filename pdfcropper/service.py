@@ -0,0 +1,408 @@
+# Serviço de fila local: recebe jobs de recorte/exportação por HTTP e por uma
+# pasta monitorada e os executa num pool limitado de processos, sem a janela.
+#
+#   python -m pdfcropper serve --watch entrada/ --output-dir saida/ \
+#       --options "--mode raster --dpi 200"
+#
+# HTTP (JSON, só em 127.0.0.1 por padrão):
+#   POST /jobs       {"input": "a.pdf", "settings": "recorte.json",
+#                     "options": ["--mode", "raster", "--dpi", "200"]}
+#                    -> 202 {"jobs": [...]}; 400 opções inválidas;
+#                       429 fila cheia; 503 serviço encerrando
+#   GET  /jobs       -> ocupação da fila e jobs recentes
+#   GET  /jobs/<id>  -> estado, tempos e resultado de um job
+#
+# "options" aceita as mesmas opções da linha de comando (pdfcropper.cli).
+# Qualquer página aberta num navegador alcança 127.0.0.1: por isso POST exige
+# Content-Type: application/json (o que obriga o navegador a uma consulta
+# CORS prévia, recusada aqui) e todo pedido precisa de um Host conhecido (sem
+# isso, um domínio apontado para 127.0.0.1 passaria por "mesma origem").
+#
+# Pasta monitorada: cada arquivo.pdf é processado com o arquivo.json ao lado
+# (formato de "Salvar Configurações"; coloque-o antes do PDF) ou, sem ele, com
+# --settings, ou só com --options. O PDF só entra na fila quando o tamanho
+# para de mudar entre duas verificações; vai para processando/ e depois para
+# concluidos/ ou falhas/, junto com um arquivo.status.json. Com a fila cheia
+# os arquivos esperam na pasta.
+import argparse
+import asyncio
+import glob
+import http
+import json
+import os
+import shlex
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from pdfcropper.cli import build_jobs, build_parser, process_file
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_POLL_SECONDS = 2.0
+# Jobs terminados mantidos para consulta em GET /jobs/<id>
+MAX_FINISHED_JOBS = 500
+MAX_BODY_BYTES = 1024 * 1024
+RETRY_AFTER_SECONDS = 5
+
+PROCESSING_DIR = "processando"
+DONE_DIR = "concluidos"
+FAILED_DIR = "falhas"
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _RequestParser(argparse.ArgumentParser):
+    # Opções inválidas num pedido viram erro 400 em vez de encerrar o serviço.
+    # Sem -h/--help: a ajuda seria impressa na saída do serviço, não no pedido.
+
+    def __init__(self, *args, **kwargs):
+        kwargs["add_help"] = False
+        super().__init__(*args, **kwargs)
+
+    def error(self, message):
+        raise RequestError(400, message)
+
+    def exit(self, status=0, message=None):
+        raise RequestError(400, (message or "opções inválidas").strip())
+
+
+def job_specs(input_path, settings=None, options=(), output_dir=None):
+    # Jobs de process_file para um pedido, validados pelo parser da CLI
+    if not isinstance(input_path, str) or not input_path:
+        raise RequestError(400, "informe o PDF em 'input'")
+    if not isinstance(options, list) or not all(isinstance(o, str) for o in options):
+        raise RequestError(400, "'options' deve ser uma lista de textos")
+    argv = [input_path] + list(options)
+    if settings:
+        argv += ["--settings", settings]
+    if output_dir and "-o" not in options and "--output-dir" not in options:
+        argv += ["-o", output_dir]
+    parser = build_parser(_RequestParser)
+    return build_jobs(parser, parser.parse_args(argv))
+
+
+class Job:
+
+    def __init__(self, spec, source):
+        self.id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.source = source
+        self.state = "queued"
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = {}
+        # Chamado no laço de eventos quando o job termina
+        self.on_finish = None
+
+    def to_json(self):
+        now = time.time()
+        data = {
+            "id": self.id,
+            "state": self.state,
+            "source": self.source,
+            "input": self.spec["input"],
+            "output": self.spec["output"],
+            "workers": self.spec["workers"],
+            "submitted": self.submitted,
+            "queue_seconds": (self.started or now) - self.submitted,
+            "run_seconds": (self.finished or now) - self.started if self.started else None,
+        }
+        for key in ("pages", "encodings", "error"):
+            if key in self.result:
+                data[key] = self.result[key]
+        return data
+
+
+class JobService:
+    # Fila limitada + `jobs` tarefas que levam os jobs ao pool de processos.
+    # Cada job usa no máximo `max_workers_per_job` processos de renderização.
+
+    def __init__(self, jobs=None, queue_size=DEFAULT_QUEUE_SIZE, max_workers_per_job=1,
+                 allowed_hosts=None):
+        # Valores aceitos no cabeçalho Host (e em Origin); None aceita qualquer um
+        self.allowed_hosts = set(allowed_hosts) if allowed_hosts else None
+        self.concurrency = max(1, jobs or os.cpu_count() or 1)
+        self.max_workers_per_job = max(1, max_workers_per_job)
+        self.queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.jobs = OrderedDict()
+        self.running = 0
+        self.closing = False
+        self.executor = ProcessPoolExecutor(max_workers=self.concurrency)
+
+    def free_slots(self):
+        return self.queue.maxsize - self.queue.qsize()
+
+    def submit(self, specs, source):
+        if self.closing:
+            raise RequestError(503, "serviço encerrando")
+        if len(specs) > self.free_slots():
+            raise RequestError(429, f"fila cheia ({self.queue.qsize()} jobs aguardando)")
+        jobs = []
+        for spec in specs:
+            spec["workers"] = min(spec["workers"], self.max_workers_per_job)
+            job = Job(spec, source)
+            self.jobs[job.id] = job
+            self.queue.put_nowait(job)
+            jobs.append(job)
+        self._forget_finished()
+        return jobs
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def status(self):
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "jobs": [job.to_json() for job in self.jobs.values()],
+        }
+
+    async def run_jobs(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.state = "running"
+            job.started = time.time()
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self.executor, process_file, job.spec)
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+            finally:
+                self.running -= 1
+            result.pop("trace", None)
+            job.result = result
+            job.finished = time.time()
+            job.state = "failed" if "error" in result else "done"
+            print(f"{job.id} {job.state:<6} {job.spec['input']} "
+                  f"({job.finished - job.started:.2f} s)"
+                  + (f": {result['error']}" if "error" in result else ""), flush=True)
+            if job.on_finish is not None:
+                job.on_finish(job)
+            self.queue.task_done()
+
+    def close(self):
+        self.closing = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                status, body = await self._dispatch(reader)
+            except RequestError as e:
+                status, body = e.status, {"error": e.message}
+            except (ValueError, asyncio.IncompleteReadError):
+                status, body = 400, {"error": "pedido inválido"}
+            payload = json.dumps(body, ensure_ascii=False).encode()
+            headers = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}",
+                       "Content-Type: application/json; charset=utf-8",
+                       f"Content-Length: {len(payload)}",
+                       "Connection: close"]
+            if status in (429, 503):
+                headers.append(f"Retry-After: {RETRY_AFTER_SECONDS}")
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "pedido grande demais")
+        body = await reader.readexactly(length) if length else b""
+        self._check_origin(headers)
+
+        path = target.split("?", 1)[0].rstrip("/")
+        if path == "/jobs" and method == "POST":
+            content_type = headers.get("content-type", "").split(";", 1)[0].strip()
+            if content_type.lower() != "application/json":
+                raise RequestError(415, "use Content-Type: application/json")
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise RequestError(400, "o corpo deve ser um objeto JSON")
+            specs = job_specs(request.get("input"), request.get("settings"),
+                              request.get("options", []), request.get("output_dir"))
+            return 202, {"jobs": [job.to_json() for job in self.submit(specs, "http")]}
+        if path == "/jobs" and method == "GET":
+            return 200, self.status()
+        if path.startswith("/jobs/") and method == "GET":
+            job = self.jobs.get(path[len("/jobs/"):])
+            if job is None:
+                raise RequestError(404, "job não encontrado")
+            return 200, job.to_json()
+        if path == "/jobs" or path.startswith("/jobs/"):
+            raise RequestError(405, "método não permitido")
+        raise RequestError(404, "caminho não encontrado")
+
+    def _check_origin(self, headers):
+        if self.allowed_hosts is None:
+            return
+        if headers.get("host", "").lower() not in self.allowed_hosts:
+            raise RequestError(403, "Host não permitido")
+        origin = headers.get("origin")
+        if origin is not None and origin.lower().partition("://")[2] not in self.allowed_hosts:
+            raise RequestError(403, "origem não permitida")
+
+    # --- Pasta monitorada ---
+
+    async def watch(self, directory, settings=None, options=(), output_dir=None,
+                    poll_seconds=DEFAULT_POLL_SECONDS):
+        output_dir = output_dir or os.path.join(directory, "saida")
+        for name in (PROCESSING_DIR, DONE_DIR, FAILED_DIR):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+        sizes = {}
+        while not self.closing:
+            for path in sorted(glob.glob(os.path.join(directory, "*.pdf"))):
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                # Ainda sendo copiado: espera o tamanho se repetir
+                if sizes.get(path) != size:
+                    sizes[path] = size
+                    continue
+                if not self.free_slots():
+                    break
+                settings_path = os.path.splitext(path)[0] + ".json"
+                if not os.path.exists(settings_path):
+                    settings_path = None
+                del sizes[path]
+                self._ingest(directory, path, settings_path or settings, options,
+                             output_dir, settings_path is not None)
+            await asyncio.sleep(poll_seconds)
+
+    def _ingest(self, directory, path, settings, options, output_dir, own_settings):
+        moved = [_move(path, os.path.join(directory, PROCESSING_DIR))]
+        if own_settings:
+            settings = _move(settings, os.path.join(directory, PROCESSING_DIR))
+            moved.append(settings)
+        try:
+            jobs = self.submit(job_specs(moved[0], settings, list(options), output_dir),
+                               "pasta")
+        except RequestError as e:
+            _finish_files(directory, moved, FAILED_DIR, {"state": "failed",
+                                                         "input": path,
+                                                         "error": e.message})
+            print(f"falha  {path}: {e.message}", flush=True)
+            return
+        for job in jobs:
+            job.on_finish = lambda job: _finish_files(
+                directory, moved, DONE_DIR if job.state == "done" else FAILED_DIR,
+                job.to_json())
+
+
+def _move(path, directory):
+    target = os.path.join(directory, os.path.basename(path))
+    shutil.move(path, target)
+    return target
+
+
+def _finish_files(directory, paths, destination, status):
+    destination = os.path.join(directory, destination)
+    for path in paths:
+        if os.path.exists(path):
+            _move(path, destination)
+    stem = os.path.splitext(os.path.basename(paths[0]))[0]
+    with open(os.path.join(destination, stem + ".status.json"), "w",
+              encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
+
+
+def allowed_hosts_for(host, port, extra=()):
+    # Valores aceitos em Host/Origin para um serviço em host:port
+    names = {host, "127.0.0.1", "localhost", "[::1]"} | set(extra)
+    allowed = {f"{name.lower()}:{port}" for name in names}
+    if port == 80:
+        allowed |= {name.lower() for name in names}
+    return allowed
+
+
+def build_service_parser():
+    parser = argparse.ArgumentParser(
+        prog="pdfcropper serve",
+        description="Fila local de recortes/exportações via HTTP e pasta monitorada.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--allow-host", action="append", default=[], metavar="NOME",
+                        help="nome aceito no cabeçalho Host além de 127.0.0.1, "
+                             "localhost e --host (pode repetir)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="jobs executados ao mesmo tempo (processos do pool)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="jobs aguardando além dos em execução; acima disso, 429")
+    parser.add_argument("--max-workers-per-job", type=int, default=1,
+                        help="limite de processos de renderização por job (--workers)")
+    parser.add_argument("--watch", metavar="PASTA",
+                        help="processar os PDFs colocados nesta pasta")
+    parser.add_argument("--settings",
+                        help="configurações para PDFs da pasta sem um .json próprio")
+    parser.add_argument("--options", default="",
+                        help="opções da CLI para os jobs da pasta, ex.: \"--mode raster\"")
+    parser.add_argument("-o", "--output-dir",
+                        help="saída dos jobs da pasta (padrão: PASTA/saida)")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS,
+                        help="intervalo entre verificações da pasta, em segundos")
+    return parser
+
+
+async def serve(args):
+    service = JobService(args.jobs, args.queue_size, args.max_workers_per_job,
+                         allowed_hosts_for(args.host, args.port, args.allow_host))
+    if args.watch and args.options:
+        # Valida as opções da pasta antes de começar
+        try:
+            build_parser(_RequestParser).parse_args(shlex.split(args.options) + ["-"])
+        except (RequestError, SystemExit) as e:
+            raise SystemExit(f"--options inválidas: {getattr(e, 'message', e)}")
+    server = await asyncio.start_server(service.handle, args.host, args.port)
+    tasks = [asyncio.create_task(service.run_jobs()) for _ in range(service.concurrency)]
+    if args.watch:
+        tasks.append(asyncio.create_task(service.watch(
+            args.watch, args.settings, shlex.split(args.options), args.output_dir,
+            args.poll)))
+    print(f"pdfcropper: http://{args.host}:{args.port}/jobs, {service.concurrency} "
+          f"jobs simultâneos, fila de {service.queue.maxsize}"
+          + (f", monitorando {args.watch}" if args.watch else ""), flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        for task in tasks:
+            task.cancel()
+
+
+def main(argv=None):
+    args = build_service_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
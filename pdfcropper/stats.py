@@ -0,0 +1,34 @@
+import time
+
+
+class FrameStats:
+    # Contador leve do tempo gasto por evento (ex.: cada <B1-Motion>)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.first = None
+        self.last = None
+
+    def record(self, started):
+        now = time.perf_counter()
+        elapsed = now - started
+        self.count += 1
+        self.total += elapsed
+        self.worst = max(self.worst, elapsed)
+        if self.first is None:
+            self.first = started
+        self.last = now
+
+    def summary(self, label):
+        if not self.count:
+            return f"{label}: sem eventos"
+        average = self.total / self.count * 1000
+        span = self.last - self.first
+        rate = self.count / span if span > 0 else 0.0
+        return (f"{label}: {self.count} eventos, {average:.2f} ms/quadro "
+                f"(máx {self.worst * 1000:.2f} ms), {rate:.0f} ev/s")
@@ -0,0 +1,59 @@
+# Faixa lateral de miniaturas: geometria das linhas e renderização em segundo plano.
+import queue
+
+from pdfcropper.core import lazy_import
+from pdfcropper.prefetch import PagePrefetcher
+
+fitz = lazy_import("fitz")  # PyMuPDF
+
+# Geometria da faixa de miniaturas (pixels de tela). Todas as linhas têm a
+# mesma altura, então a posição de qualquer página é calculada sem percorrer
+# as anteriores.
+THUMB_WIDTH = 96
+THUMB_HEIGHT = 128
+THUMB_PAD = 8
+THUMB_LABEL_HEIGHT = 14
+THUMB_ROW_HEIGHT = THUMB_HEIGHT + 2 * THUMB_PAD + THUMB_LABEL_HEIGHT
+THUMB_STRIP_WIDTH = THUMB_WIDTH + 2 * THUMB_PAD
+# Limite do cache de miniaturas (separado do cache das páginas)
+THUMB_CACHE_MB = 32
+
+
+def thumbnail_key(page_num, rotation, cropbox):
+    # O cropbox faz parte da chave: aplicar um recorte gera outra miniatura
+    return ("thumb", page_num, rotation, tuple(round(v, 2) for v in cropbox))
+
+
+def thumbnail_range(top, height, page_count, margin=1):
+    # Páginas com linha visível entre `top` e `top + height` (coordenadas da
+    # faixa), mais `margin` linhas de cada lado
+    first = max(0, int(top // THUMB_ROW_HEIGHT) - margin)
+    last = min(page_count, int((top + height) // THUMB_ROW_HEIGHT) + 1 + margin)
+    return range(first, last)
+
+
+def thumbnail_zoom(page_rect):
+    return min(THUMB_WIDTH / page_rect.width, THUMB_HEIGHT / page_rect.height)
+
+
+def render_thumbnail(page):
+    zoom = thumbnail_zoom(page.rect)
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+
+
+class ThumbnailRenderer(PagePrefetcher):
+    # Renderiza miniaturas em baixa resolução fora da thread do Tk. As páginas
+    # prontas são anunciadas na fila `done`; a janela cria as PhotoImage.
+
+    trace_name = "thumbnail"
+    render_page = staticmethod(render_thumbnail)
+
+    def __init__(self, source_path, cache, disk_cache=None, fingerprint=None):
+        super().__init__(source_path, cache, disk_cache, fingerprint)
+        self.done = queue.Queue()
+
+    def cache_key(self, page_num, rotation, cropbox):
+        return thumbnail_key(page_num, rotation, cropbox)
+
+    def on_rendered(self, page_num):
+        self.done.put(page_num)
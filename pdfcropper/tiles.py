@@ -0,0 +1,35 @@
+# Geometria dos blocos (tiles) usados para exibir páginas com zoom alto: só os
+# blocos que aparecem no canvas são renderizados.
+
+TILE_SIZE = 256
+# Acima deste zoom a página é exibida em blocos em vez de uma imagem inteira
+TILE_ZOOM_THRESHOLD = 1.5
+
+
+def visible_tiles(image_size, offset, viewport, tile_size=TILE_SIZE):
+    # Índices (tx, ty) dos blocos da imagem ampliada que cruzam a área visível.
+    # offset é a posição do canto da imagem no canvas; viewport o tamanho do canvas.
+    width, height = image_size
+    x_offset, y_offset = offset
+    view_width, view_height = viewport
+
+    x0 = max(0, -x_offset)
+    y0 = max(0, -y_offset)
+    x1 = min(width, view_width - x_offset)
+    y1 = min(height, view_height - y_offset)
+    if x1 <= x0 or y1 <= y0:
+        return []
+
+    return [(tx, ty)
+            for ty in range(int(y0 // tile_size), int((y1 - 1) // tile_size) + 1)
+            for tx in range(int(x0 // tile_size), int((x1 - 1) // tile_size) + 1)]
+
+
+def tile_clip(tile, zoom, image_size, tile_size=TILE_SIZE):
+    # Retângulo (x0, y0, x1, y1) da página, em pontos, coberto pelo bloco
+    tx, ty = tile
+    x0 = tx * tile_size
+    y0 = ty * tile_size
+    x1 = min(x0 + tile_size, image_size[0])
+    y1 = min(y0 + tile_size, image_size[1])
+    return (x0 / zoom, y0 / zoom, x1 / zoom, y1 / zoom)
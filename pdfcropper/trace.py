@@ -0,0 +1,169 @@
+# Rastreamento por etapa das renderizações e exportações.
+#
+#   with trace.span("get_pixmap", page=3) as s:
+#       pix = page.get_pixmap(...)
+#       s.add(bytes=len(pix.samples))
+#
+# Desligado (o padrão), span() devolve sempre o mesmo objeto vazio: o custo é
+# uma chamada de função por etapa. Ligado com enable() (ou a variável
+# PDFCROPPER_TRACE=arquivo), cada etapa vira um evento "X" no formato Chrome
+# trace (chrome://tracing, Perfetto); arquivos .jsonl recebem um evento por
+# linha. summary_lines() resume p50/p95 por etapa.
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "PDFCROPPER_TRACE"
+
+_tracer = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "started")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.started, time.perf_counter(), self.args)
+        return False
+
+    def add(self, **args):
+        # Contadores da etapa (bytes, estratégia...) gravados em "args"
+        self.args.update(args)
+
+
+def _percentile(values, fraction):
+    # values ordenados; percentil pelo posto mais próximo
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class Tracer:
+    # Eventos de todas as threads do processo; os de outros processos entram
+    # com merge() (os relógios de perf_counter são do sistema todo)
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = []
+        self.pid = os.getpid()
+
+    def record(self, name, started, ended, args):
+        # list.append é atômico: as threads de pré-carregamento gravam direto
+        self.events.append({
+            "name": name, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+            "ts": round(started * 1e6, 1), "dur": round((ended - started) * 1e6, 1),
+            "args": args,
+        })
+
+    def write(self, path=None):
+        path = path or self.path
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for event in self.events:
+                    f.write(json.dumps(event) + "\n")
+            else:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def summary_lines(self):
+        stages = {}
+        for event in self.events:
+            stage = stages.setdefault(event["name"], ([], []))
+            stage[0].append(event["dur"] / 1000)
+            stage[1].append(event["args"].get("bytes", 0))
+        lines = [f"{'etapa':<16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} "
+                 f"{'total ms':>10} {'KB':>10}"]
+        for name, (durations, sizes) in sorted(
+                stages.items(), key=lambda item: -sum(item[1][0])):
+            durations.sort()
+            lines.append(f"{name:<16} {len(durations):>6} "
+                         f"{_percentile(durations, 0.5):>9.2f} "
+                         f"{_percentile(durations, 0.95):>9.2f} "
+                         f"{sum(durations):>10.1f} {sum(sizes) / 1024:>10.1f}")
+        return lines
+
+
+def span(name, **args):
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, args)
+
+
+def record(name, started, **args):
+    # Alternativa a span() para trechos longos: `started` é um perf_counter()
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, started, time.perf_counter(), args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable(path=None):
+    # Mantém o rastreador atual se já estiver ligado. Um processo criado com
+    # fork herda o do pai (e os eventos dele): nesse caso começa outro.
+    global _tracer
+    if _tracer is None or _tracer.pid != os.getpid():
+        _tracer = Tracer(path)
+    elif path:
+        _tracer.path = path
+    return _tracer
+
+
+def enable_from_env():
+    path = os.environ.get(TRACE_ENV)
+    return enable(path) if path else None
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def drain():
+    # Retira os eventos gravados até aqui (para devolvê-los a outro processo)
+    if _tracer is None:
+        return []
+    events, _tracer.events = _tracer.events, []
+    return events
+
+
+def merge(events):
+    if _tracer is not None and events:
+        _tracer.events.extend(events)
+
+
+def finish():
+    # Desliga, grava o arquivo (se houver) e devolve as linhas do resumo
+    tracer = disable()
+    if tracer is None:
+        return []
+    if tracer.path:
+        tracer.write()
+    return tracer.summary_lines()
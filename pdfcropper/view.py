@@ -0,0 +1,61 @@
+# Trabalho de tela sem o Tk: página na rotação exibida, imagem base em
+# Matrix(1, 1), tamanhos e redimensionamento do zoom e aplicação de recortes.
+# A janela e a suíte de benchmarks (benchmarks/bench_suite.py) usam estas
+# mesmas funções, então uma mudança aqui aparece nas medições.
+from pdfcropper import trace
+from pdfcropper.core import lazy_import
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
+
+
+def load_rotated(doc, page_num, rotation):
+    # A página com a rotação exibida (a rotação fica no documento aberto)
+    page = doc.load_page(page_num)
+    if page.rotation != rotation:
+        page.set_rotation(rotation)
+    return page
+
+
+def render_base(page):
+    return page.get_pixmap(matrix=fitz.Matrix(1, 1))
+
+
+def base_image(page):
+    # Devolve (imagem PIL, pixmap) da página em Matrix(1, 1)
+    with trace.span("get_pixmap", page=page.number + 1) as span:
+        pix = render_base(page)
+        span.add(bytes=len(pix.samples_mv))
+    with trace.span("frombytes", page=page.number + 1):
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    return img, pix
+
+
+def view_sizes(page_size, display_scale, scale_factor):
+    # (tamanho da tela, tamanho da imagem no zoom) de uma página de page_size
+    # pixels em Matrix(1, 1)
+    base = (int(page_size[0] * display_scale), int(page_size[1] * display_scale))
+    return base, (int(base[0] * scale_factor), int(base[1] * scale_factor))
+
+
+def resize_view(img, size, page_num):
+    with trace.span("resize", page=page_num + 1):
+        return img.resize(size, Image.Resampling.LANCZOS)
+
+
+def apply_crop(doc, crop_table, page_nums, rect, original_cropboxes=None):
+    # Registra o recorte na tabela e o aplica às páginas abertas (limitado à
+    # mediabox). original_cropboxes guarda o cropbox anterior de cada página
+    # alterada pela primeira vez. Devolve as páginas alteradas.
+    crop_table.set(page_nums, rect)
+    changed = []
+    for page_num in page_nums:
+        page = doc.load_page(page_num)
+        box = fitz.Rect(rect) & page.mediabox
+        if box.is_empty:
+            continue
+        if original_cropboxes is not None and page_num not in original_cropboxes:
+            original_cropboxes[page_num] = page.cropbox
+        page.set_cropbox(box)
+        changed.append(page_num)
+    return changed
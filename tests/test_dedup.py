@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+fitz = pytest.importorskip("fitz")
+
+from pdfcropper.croptable import CropTable  # noqa: E402
+from pdfcropper.dedup import PageHasher  # noqa: E402
+from pdfcropper.export import export_pages  # noqa: E402
+
+A4 = (595, 842)
+
+
+def _source(path, pages=2):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=A4[0], height=A4[1])
+        page.insert_text((72, 100), "Topo", fontsize=20)
+        page.insert_text((72, 700), "Rodapé", fontsize=20)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _digests(path):
+    doc = fitz.open(path)
+    hasher = PageHasher(doc)
+    digests = [hasher.page_digest(page) for page in doc]
+    doc.close()
+    return digests
+
+
+def test_copies_of_a_page_are_duplicates(tmp_path):
+    path = _source(str(tmp_path / "origem.pdf"))
+    doc = fitz.open(path)
+    doc.insert_pdf(fitz.open(path), from_page=0, to_page=0)
+    doc.save(str(tmp_path / "copias.pdf"))
+    digests = _digests(str(tmp_path / "copias.pdf"))
+    assert digests[0] == digests[1] == digests[2]
+
+
+def test_same_form_with_different_clip_is_not_duplicate(tmp_path):
+    # Recortes par/ímpar diferentes da mesma página: os formulários da saída
+    # vetorial têm o mesmo stream e /BBox e /Matrix diferentes
+    source = _source(str(tmp_path / "origem.pdf"))
+    crop_table = CropTable(2)
+    crop_table.set([0], fitz.Rect(0, 0, A4[0], A4[1] / 2))
+    crop_table.set([1], fitz.Rect(0, A4[1] / 2, A4[0], A4[1]))
+    vector = str(tmp_path / "vetorial.pdf")
+    export_pages(source, [0, 1], None, A4, vector, mode="vector", crop_table=crop_table)
+    digests = _digests(vector)
+    assert digests[0] != digests[1]
+
+    raster = str(tmp_path / "raster.pdf")
+    stats = export_pages(vector, [0, 1], None, A4, raster, mode="raster", dpi=50)
+    assert stats.duplicates == 0
+    doc = fitz.open(raster)
+    pixmaps = [page.get_pixmap(matrix=fitz.Matrix(0.2, 0.2)).digest for page in doc]
+    doc.close()
+    assert pixmaps[0] != pixmaps[1]
+
+
+def test_same_form_with_different_rotation_is_not_duplicate(tmp_path):
+    source = fitz.open(_source(str(tmp_path / "origem.pdf")))
+    doc = fitz.open()
+    for rotate in (0, 90):
+        doc.new_page(width=A4[0], height=A4[1]).show_pdf_page(
+            fitz.Rect(0, 0, A4[0], A4[1]), source, 0, rotate=rotate)
+    hasher = PageHasher(doc)
+    assert hasher.page_digest(doc[0]) != hasher.page_digest(doc[1])
+
+
+def test_repeated_pages_share_one_image_across_segments(tmp_path):
+    # Páginas iguais em segmentos diferentes apontam para a mesma imagem,
+    # gravada no primeiro segmento
+    source = _source(str(tmp_path / "origem.pdf"), pages=7)
+    output = str(tmp_path / "raster.pdf")
+    stats = export_pages(source, range(7), None, A4, output, mode="raster", dpi=50,
+                         segment_pages=2)
+    assert stats.duplicates == 6
+    doc = fitz.open(output)
+    assert len(doc) == 7
+    assert {page.get_images()[0][0] for page in doc} == {doc[0].get_images()[0][0]}
+    doc.close()
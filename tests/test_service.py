@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+fitz = pytest.importorskip("fitz")
+
+from pdfcropper.service import JobService, allowed_hosts_for  # noqa: E402
+
+
+@pytest.fixture
+def service():
+    # Serviço com fila de 1 job e sem tarefas consumindo a fila: o segundo
+    # pedido encontra a fila cheia
+    loop = asyncio.new_event_loop()
+    state = {}
+    ready = threading.Event()
+
+    async def start():
+        state["service"] = JobService(jobs=1, queue_size=1)
+        state["server"] = await asyncio.start_server(state["service"].handle,
+                                                     "127.0.0.1", 0)
+        state["port"] = state["server"].sockets[0].getsockname()[1]
+        state["service"].allowed_hosts = allowed_hosts_for("127.0.0.1", state["port"])
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait(10)
+    yield state
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    state["server"].close()
+    state["service"].close()
+
+
+def request(state, method, body=None, headers=None, path="/jobs"):
+    headers = dict(headers or {})
+    data = None
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers.setdefault("Content-Type", "application/json")
+    req = urllib.request.Request(f"http://127.0.0.1:{state['port']}{path}",
+                                 data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "entrada.pdf")
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_accepts_job_then_reports_full_queue(service, pdf, tmp_path):
+    body = {"input": pdf, "options": ["-o", str(tmp_path / "saida")]}
+    status, reply = request(service, "POST", body)
+    assert status == 202
+    job_id = reply["jobs"][0]["id"]
+    assert request(service, "GET", path=f"/jobs/{job_id}")[1]["state"] == "queued"
+
+    status, reply = request(service, "POST", body)
+    assert status == 429
+
+
+def test_invalid_options_are_400(service, pdf, capfd):
+    assert request(service, "POST", {"input": pdf, "options": ["--mode", "x"]})[0] == 400
+    for option in ("--help", "-h"):
+        status, reply = request(service, "POST", {"input": pdf, "options": [option]})
+        assert status == 400
+        assert "error" in reply
+    # A ajuda da CLI não vai para a saída do serviço
+    assert "usage:" not in capfd.readouterr().out
+
+
+def test_refuses_other_host_and_origin(service, pdf):
+    body = {"input": pdf}
+    assert request(service, "POST", body, {"Host": "exemplo.com"})[0] == 403
+    assert request(service, "GET", headers={"Host": "exemplo.com"})[0] == 403
+    assert request(service, "POST", body, {"Origin": "http://exemplo.com"})[0] == 403
+
+
+def test_post_requires_json_content_type(service, pdf):
+    status, _ = request(service, "POST", {"input": pdf}, {"Content-Type": "text/plain"})
+    assert status == 415